@@ -2,7 +2,7 @@
 
 # Start the FastAPI server in the background
 cd server
-uvicorn main:app --reload --port 8000 &
+uvicorn main:app --reload --port 8000 --ws compression:WebSocketProtocol &
 SERVER_PID=$!
 cd ..
 
@@ -0,0 +1,104 @@
+from typing import Dict, List, Optional
+
+# Strains in bidding order, a bid must outrank the current one by level then strain
+STRAINS = {"clubs": 0, "diamonds": 1, "hearts": 2, "spades": 3, "NT": 4}
+CALLS = ("Pass", "Double", "Redouble")
+# How each call is written in the bidding history, same as the client's bidding box
+CALL_DISPLAY = {"Pass": "Pass", "Double": "X", "Redouble": "XX"}
+SUIT_SYMBOLS = {"spades": "♠", "hearts": "♥", "diamonds": "♦", "clubs": "♣", "NT": "NT"}
+
+
+def call_display(level: int, suit: str) -> str:
+    """Display text of a validated call, such as 3♥, X or Pass"""
+    if suit in CALL_DISPLAY:
+        return CALL_DISPLAY[suit]
+    return f"{level}{SUIT_SYMBOLS[suit]}"
+
+
+class Auction:
+    """
+    Incremental state of the auction for one deal.
+    Tracks the current high bid, double/redouble state, consecutive passes and
+    the first player of each side to name each strain, so every call is
+    validated and applied in O(1) and the final contract needs no rescan of
+    the bidding history.
+    """
+
+    __slots__ = (
+        "high_level", "high_strain", "high_player", "doubled", "redoubled",
+        "passes", "calls", "first_bidder", "ended",
+    )
+
+    def __init__(self):
+        self.high_level: int = 0  # 0 until someone makes a real bid
+        self.high_strain: Optional[str] = None
+        self.high_player: Optional[int] = None
+        self.doubled: bool = False
+        self.redoubled: bool = False
+        self.passes: int = 0  # Consecutive passes since the last non-pass call
+        self.calls: int = 0  # Total calls made
+        self.first_bidder: List[List[Optional[int]]] = [[None] * 5, [None] * 5]  # [side][strain] -> player
+        self.ended: bool = False
+
+    def validate(self, player: int, level: int, suit: str) -> Optional[str]:
+        """Return an error message if the call is not legal, None if it is"""
+        if self.ended:
+            return "Bidding has ended"
+
+        if suit in CALLS:
+            if level != 0:
+                return "Invalid bid"
+            if suit == "Double":
+                # Only the opponents' undoubled bid can be doubled
+                if self.high_player is None or self.high_player % 2 == player % 2 or self.doubled:
+                    return "Double is not allowed"
+            elif suit == "Redouble":
+                # Only our side's doubled bid can be redoubled
+                if self.high_player is None or self.high_player % 2 != player % 2 or not self.doubled or self.redoubled:
+                    return "Redouble is not allowed"
+            return None
+
+        strain = STRAINS.get(suit)
+        if strain is None or not 1 <= level <= 7:
+            return "Invalid bid"
+        if self.high_strain is not None and (level, strain) <= (self.high_level, STRAINS[self.high_strain]):
+            return "Bid must be higher than the current bid"
+        return None
+
+    def apply(self, player: int, level: int, suit: str):
+        """Record a call that has already passed validate()"""
+        self.calls += 1
+
+        if suit == "Pass":
+            self.passes += 1
+            # Four passes in a row at the start, or three after any other call
+            if self.passes == 4 or (self.passes == 3 and self.high_strain is not None):
+                self.ended = True
+            return
+
+        self.passes = 0
+        if suit == "Double":
+            self.doubled = True
+        elif suit == "Redouble":
+            self.redoubled = True
+        else:
+            self.high_level = level
+            self.high_strain = suit
+            self.high_player = player
+            self.doubled = False
+            self.redoubled = False
+            side = player % 2
+            if self.first_bidder[side][STRAINS[suit]] is None:
+                self.first_bidder[side][STRAINS[suit]] = player
+
+    def contract(self) -> Optional[Dict]:
+        """The final contract, None if the deal was passed out"""
+        if self.high_strain is None:
+            return None
+        return {
+            'level': self.high_level,
+            'suit': self.high_strain,
+            'declarer': self.first_bidder[self.high_player % 2][STRAINS[self.high_strain]],
+            'doubled': self.doubled,
+            'redoubled': self.redoubled
+        }
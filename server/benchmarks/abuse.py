@@ -0,0 +1,150 @@
+"""
+Check that the server stays responsive while clients flood it.
+
+Runs the server in-process with a probe player who keeps taking seats at
+their own table and times each round trip (iam: until the game_state
+reply). Abusive clients flood create:, bid:, play: and junk from other
+loopback addresses as fast as they can, reconnecting whenever they are cut
+off. They run in two separate processes that multiplex all connections,
+so on a small machine the flood doesn't take most of the CPU just by
+having more processes than the server. Reports probe latency, tables created and
+server memory for a quiet baseline, then the flood with rate limiting on
+and off.
+
+Usage (from the server directory, Linux loopback addresses 127.0.1.x):
+    python benchmarks/abuse.py [seconds] [connections]
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import multiprocessing
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import websockets
+
+ADDRESSES = 4  # Abusive connections are spread over this many source addresses
+PROCESSES = 2  # Abusive connections are split over this many processes
+PROBE_INTERVAL = 0.2  # Seconds between probe round trips
+PROBE_TIMEOUT = 5.0  # A round trip slower than this counts as this long
+
+FLOOD = ["create:", "bid:1:NT:x:1:1NT", "play:spades:0:1", "start:", "x" * 200]
+
+
+async def flood(url: str, address: str, seconds: float, sent):
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        try:
+            async with websockets.connect(url, local_addr=(address, 0), max_queue=None) as ws:
+                async def drain():
+                    try:
+                        async for _ in ws:
+                            pass
+                    except websockets.ConnectionClosed:
+                        pass
+
+                reader = asyncio.create_task(drain())
+                while time.monotonic() < deadline:
+                    for message in FLOOD:
+                        await ws.send(message)
+                        sent.value += 1
+                    await asyncio.sleep(0)
+                reader.cancel()
+        except (websockets.ConnectionClosed, websockets.InvalidStatus, OSError):
+            await asyncio.sleep(0.01)
+
+
+async def flood_all(url: str, addresses, seconds: float, sent):
+    await asyncio.gather(*(flood(url, address, seconds, sent) for address in addresses))
+
+
+def abuser(url: str, addresses, seconds: float, sent):
+    # Only websockets is imported here, the server modules are imported by run()
+    asyncio.run(flood_all(url, addresses, seconds, sent))
+
+
+async def probe(url: str, seconds: float):
+    """Round trip times of a well-behaved player"""
+    times = []
+    deadline = time.monotonic() + seconds
+    while True:
+        # An overloaded server may not even complete the handshake
+        try:
+            ws = await websockets.connect(url, open_timeout=PROBE_TIMEOUT)
+            break
+        except TimeoutError:
+            times.append(PROBE_TIMEOUT)
+            if time.monotonic() >= deadline:
+                return times
+    await ws.send("create:")
+    await ws.recv()
+    seat = 0
+    while time.monotonic() < deadline:
+        seat ^= 1
+        start = time.perf_counter()
+        await ws.send(f"iam:{['north', 'south'][seat]}")
+        try:
+            while json.loads(await asyncio.wait_for(ws.recv(), PROBE_TIMEOUT))["type"] != "game_state":
+                pass
+            times.append(time.perf_counter() - start)
+        except asyncio.TimeoutError:
+            times.append(PROBE_TIMEOUT)
+        await asyncio.sleep(PROBE_INTERVAL)
+    await ws.close()
+    return times
+
+
+def resident_mb() -> float:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+
+
+async def phase(label: str, url: str, seconds: float, connections: int, limited: bool):
+    import main
+    import limits
+
+    limits.RATE_LIMIT_ENABLED = limited
+    tables = len(main.games)
+    context = multiprocessing.get_context("spawn")
+    addresses = [f"127.0.1.{i % ADDRESSES + 1}" for i in range(connections)]
+    workers = min(PROCESSES, connections)
+    sent = [context.Value("q", 0, lock=False) for _ in range(workers)]
+    processes = [
+        context.Process(target=abuser, args=(url, addresses[i::workers], seconds + 1, sent[i]))
+        for i in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    await asyncio.sleep(1 if connections else 0)  # Let the flood build up
+
+    times = sorted(await probe(url, seconds))
+    for process in processes:
+        process.join()
+    await asyncio.sleep(0.5)
+
+    messages = sum(value.value for value in sent)
+    slow = sum(1 for t in times if t > 0.1) / len(times)
+    print(
+        f"{label:<26} probe p50 {times[len(times) // 2] * 1000:7.1f} ms  p99 {times[int(len(times) * 0.99)] * 1000:7.1f} ms"
+        f"  >100 ms {slow:4.0%} | {messages / (seconds + 1):7.0f} flood msgs/s"
+        f" | {len(main.games) - tables:5d} tables | RSS {resident_mb():6.0f} MB"
+    )
+
+
+async def run(seconds: float, connections: int):
+    from frames_per_hand import start_server
+
+    url = start_server()
+    # Probe traffic from 127.0.0.1 gets the same budgets as any other address
+    await phase("no flood", url, seconds, 0, True)
+    await phase("flood, rate limited", url, seconds, connections, True)
+    await phase("flood, no rate limiting", url, seconds, connections, False)
+
+
+if __name__ == "__main__":
+    asyncio.run(run(
+        float(sys.argv[1]) if len(sys.argv) > 1 else 10,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 8,
+    ))
@@ -0,0 +1,85 @@
+"""
+Check the incremental Auction against check_bidding_end / get_final_contract
+on random legal auctions, and time both.
+
+Usage (from the server directory):
+    python benchmarks/auction.py [auctions] [seed]
+"""
+import os
+import sys
+import time
+import random
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from auction import Auction, STRAINS, CALLS
+from main import check_bidding_end, get_final_contract
+
+BIDS = [(level, suit) for level in range(1, 8) for suit in STRAINS]
+
+
+def random_auction(rng: random.Random):
+    """Build a random legal auction, returns the bidding history"""
+    auction = Auction()
+    history = []
+    player = rng.randrange(4)
+    while not auction.ended:
+        legal = [(0, call) for call in CALLS if auction.validate(player, 0, call) is None]
+        # Favour passes so auctions end at realistic lengths
+        if rng.random() < 0.5:
+            level, suit = 0, "Pass"
+        elif rng.random() < 0.8:
+            higher = [b for b in BIDS if auction.validate(player, *b) is None]
+            level, suit = rng.choice(higher[:6] or legal)
+        else:
+            level, suit = rng.choice(legal)
+
+        assert auction.validate(player, level, suit) is None
+        auction.apply(player, level, suit)
+        history.append({"player": "", "playerIndex": player, "level": level, "suit": suit, "display": ""})
+        player = (player + 1) % 4
+
+        # The end of the auction must agree with the reference implementation after every call
+        assert auction.ended == check_bidding_end(history), history
+    assert auction.contract() == get_final_contract(history), history
+    return history
+
+
+def replay_reference(history):
+    seen = []
+    for bid in history:
+        seen.append(bid)
+        if check_bidding_end(seen):
+            return get_final_contract(seen)
+
+
+def replay_incremental(history):
+    auction = Auction()
+    for bid in history:
+        auction.validate(bid["playerIndex"], bid["level"], bid["suit"])
+        auction.apply(bid["playerIndex"], bid["level"], bid["suit"])
+        if auction.ended:
+            return auction.contract()
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    rng = random.Random(int(sys.argv[2]) if len(sys.argv) > 2 else 0)
+
+    auctions = [random_auction(rng) for _ in range(count)]
+    calls = sum(len(history) for history in auctions)
+    print(f"{count} random auctions ({calls} calls) match check_bidding_end / get_final_contract")
+
+    # Replay the way the server sees them, one call at a time
+    started = time.perf_counter()
+    for history in auctions:
+        replay_reference(history)
+    reference = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for history in auctions:
+        replay_incremental(history)
+    incremental = time.perf_counter() - started
+
+    print(f"rescanning history: {reference / calls * 1e6:.2f} us/call")
+    print(f"incremental auction (with validation): {incremental / calls * 1e6:.2f} us/call")
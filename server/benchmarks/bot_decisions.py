@@ -0,0 +1,99 @@
+"""
+Time bot decisions against the per-decision budget.
+
+Deals random hands and has the bot engine bid and play all four seats in
+this process, the way the worker pool runs it, then reports the time per
+call and per card and how the auctions ended.
+
+Usage (from the server directory):
+    python benchmarks/bot_decisions.py [deals] [budget_ms]
+"""
+import os
+import sys
+import time
+import random
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from auction import Auction
+from bots import SUITS, choose_call, choose_card, trick_winner
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def play_deal(rng: random.Random, dealer: int, budget_ms: float, call_times, card_times, contracts):
+    deck = list(range(1, 53))
+    rng.shuffle(deck)
+    hands = {seat: sorted(deck[seat * 13:(seat + 1) * 13]) for seat in range(4)}
+
+    # Auction
+    auction = Auction()
+    calls = []
+    player = (dealer + 1) % 4
+    while not auction.ended:
+        start = time.perf_counter()
+        level, suit = choose_call(hands[player], player, calls)
+        call_times.append(time.perf_counter() - start)
+        assert auction.validate(player, level, suit) is None
+        auction.apply(player, level, suit)
+        calls.append((player, level, suit))
+        player = (player + 1) % 4
+
+    contract = auction.contract()
+    if contract is None:
+        contracts["passed out"] += 1
+        return
+    contracts[f"{contract['level']}{contract['suit']}"] += 1
+
+    # Play
+    declarer = contract["declarer"]
+    dummy = (declarer + 2) % 4
+    trump = None if contract["suit"] == "NT" else contract["suit"]
+    trump_index = SUITS.index(trump) if trump else None
+    plays = bytearray()
+    trick = []
+    player = (declarer + 1) % 4
+    while len(plays) < 52:
+        seat = declarer if player == dummy else player
+        known = {seat: hands[seat]}
+        if plays:
+            known[dummy] = hands[dummy]
+        start = time.perf_counter()
+        card = choose_card(seat, player, trump, known, bytes(plays), budget_ms)
+        card_times.append(time.perf_counter() - start)
+
+        hands[player].remove(card)
+        plays.append(card << 2 | player)
+        trick.append(((card - 1) // 13, (card - 1) % 13, player))
+        player = (player + 1) % 4
+        if len(trick) == 4:
+            player = trick_winner(trick, trump_index)[2]
+            trick = []
+
+
+def run(deals: int, budget_ms: float):
+    rng = random.Random(1)
+    call_times, card_times = [], []
+    contracts = Counter()
+    for deal in range(deals):
+        play_deal(rng, deal % 4, budget_ms, call_times, card_times, contracts)
+
+    print(f"{deals} deals, {budget_ms:.0f} ms budget per decision")
+    for label, times in [("call", call_times), ("card", card_times)]:
+        if times:
+            print(
+                f"  {label}: {len(times)} decisions, mean {sum(times) / len(times) * 1000:.2f} ms,"
+                f" p99 {percentile(times, 0.99) * 1000:.2f} ms, max {max(times) * 1000:.2f} ms"
+            )
+    print("  contracts: " + ", ".join(f"{name} x{count}" for name, count in contracts.most_common()))
+
+
+if __name__ == "__main__":
+    run(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 10,
+        float(sys.argv[2]) if len(sys.argv) > 2 else 200,
+    )
@@ -0,0 +1,150 @@
+"""
+Compare permessage-deflate policies on the messages of typical hands.
+
+Plays hands with four bot players and a spectator, once with batching off
+and once with it on, records every message each connection receives, then
+replays each connection's stream through the server-side compressor under
+several policies and reports bytes on the wire, CPU time spent compressing
+and the zlib memory held per connection.
+
+Usage (from the server directory):
+    python benchmarks/compression.py [hands]
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import websockets
+from websockets.frames import Frame, Opcode
+
+from frames_per_hand import Bot, DIRECTIONS, start_server
+from compression import SelectivePerMessageDeflate
+
+# (label, level, memLevel, window bits, minimum size)
+POLICIES = [
+    ("level 6, mem 8, window 15", 6, 8, 15, 0),
+    ("level 6, mem 5, window 12", 6, 5, 12, 0),
+    ("level 1, mem 5, window 12", 1, 5, 12, 0),
+    ("level 6, mem 5, window 12, >=64B", 6, 5, 12, 64),
+    ("level 6, mem 5, window 12, >=128B", 6, 5, 12, 128),
+    ("level 6, mem 5, window 12, >=256B", 6, 5, 12, 256),
+]
+
+
+class RecordingBot(Bot):
+    def __init__(self, seat: int, batch: bool):
+        super().__init__(seat, batch)
+        self.messages = []
+
+    async def run(self):
+        async for raw in self.ws:
+            self.messages.append(raw.encode())
+            message = json.loads(raw)
+            events = message["events"] if message["type"] == "batch" else [message]
+            for event in events:
+                await self.handle(event)
+
+
+async def connect(url: str, batch: bool):
+    ws = await websockets.connect(url, compression=None)
+    if batch:
+        await ws.send("caps:batch")
+        await ws.recv()
+    return ws
+
+
+async def record(url: str, hands: int, batch: bool):
+    """Message streams received by each player and by a spectator"""
+    bots = [RecordingBot(seat, batch) for seat in range(4)]
+    for bot in bots:
+        bot.ws = await connect(url, batch)
+
+    await bots[0].ws.send("create:")
+    message = json.loads(await bots[0].ws.recv())
+    code = (message["events"][0] if message["type"] == "batch" else message)["code"]
+    for bot in bots[1:]:
+        await bot.ws.send(f"join:{code}")
+    for bot in bots:
+        await bot.ws.send(f"iam:{DIRECTIONS[bot.seat]}")
+    await asyncio.sleep(0.2)
+
+    spectator = await connect(url, batch)
+    await spectator.send(f"watch:{code}")
+    watched = []
+
+    async def watch():
+        async for raw in spectator:
+            watched.append(raw.encode())
+
+    tasks = [asyncio.create_task(bot.run()) for bot in bots] + [asyncio.create_task(watch())]
+
+    for _ in range(hands):
+        for bot in bots:
+            bot.done.clear()
+            bot.bid_made = False
+        await bots[0].ws.send("start:")
+        await asyncio.wait_for(asyncio.gather(*(bot.done.wait() for bot in bots)), 30)
+    await asyncio.sleep(0.5)
+
+    for task in tasks:
+        task.cancel()
+    for ws in [bot.ws for bot in bots] + [spectator]:
+        await ws.close()
+    return [bot.messages for bot in bots] + [watched]
+
+
+def replay(streams, level: int, mem_level: int, window_bits: int, min_size: int):
+    """Bytes out, messages deflated and CPU seconds to compress every stream on its own connection"""
+    wire = 0
+    compressed = 0
+    cpu = 0.0
+    for stream in streams:
+        extension = SelectivePerMessageDeflate(
+            False, False, 15, window_bits, {"level": level, "memLevel": mem_level}, min_size=min_size,
+        )
+        start = time.process_time()
+        for message in stream:
+            frame = extension.encode(Frame(Opcode.TEXT, message))
+            wire += len(frame.data)
+            compressed += frame.rsv1
+        cpu += time.process_time() - start
+    return wire, compressed, cpu
+
+
+def zlib_memory(mem_level: int, window_bits: int) -> int:
+    """Approximate bytes zlib keeps for one compressor (see zconf.h)"""
+    return (1 << (window_bits + 2)) + (1 << (mem_level + 9))
+
+
+def report(streams, hands: int):
+    messages = sum(len(stream) for stream in streams)
+    raw = sum(len(message) for stream in streams for message in stream)
+    small = sum(1 for stream in streams for message in stream if len(message) < 128)
+    print(f"{messages / hands:.0f} messages/hand, {raw / hands / 1024:.1f} KiB/hand uncompressed, {small / messages:.0%} under 128 bytes")
+    print(f"{'policy':<36} {'KiB/hand':>9} {'saved':>6} {'deflated':>9} {'CPU us/hand':>12} {'KiB/conn':>9}")
+    for label, level, mem_level, window_bits, min_size in POLICIES:
+        best = None
+        for _ in range(5):
+            wire, compressed, cpu = replay(streams, level, mem_level, window_bits, min_size)
+            best = cpu if best is None else min(best, cpu)
+        print(
+            f"{label:<36} {wire / hands / 1024:>9.1f} {1 - wire / raw:>6.0%} {compressed / messages:>9.0%}"
+            f" {best / hands * 1e6:>12.0f} {zlib_memory(mem_level, window_bits) / 1024:>9.0f}"
+        )
+
+
+async def run(hands: int):
+    url = start_server()
+    for batch in [False, True]:
+        streams = await record(url, hands, batch)
+        print()
+        print(f"{'batched' if batch else 'unbatched'}, {hands} hands, 4 players + 1 spectator")
+        report(streams, hands)
+
+
+if __name__ == "__main__":
+    asyncio.run(run(int(sys.argv[1]) if len(sys.argv) > 1 else 20))
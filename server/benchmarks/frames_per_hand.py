@@ -0,0 +1,178 @@
+"""
+Count WebSocket frames and socket writes per hand, with and without batching.
+
+Starts the server in-process, plays hands with four simple bot clients and
+reports the frames received by the clients and the transport writes made by
+the server (asyncio issues one send() per write while the socket keeps up).
+
+Usage (from the server directory):
+    python benchmarks/frames_per_hand.py [hands]
+"""
+import os
+import sys
+import json
+import time
+import socket
+import asyncio
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import uvicorn
+import websockets
+from asyncio import selector_events
+
+import main
+import limits
+
+SUITS = ["spades", "hearts", "diamonds", "clubs"]
+DIRECTIONS = ["west", "north", "east", "south"]
+
+server_writes = 0
+_write = selector_events._SelectorSocketTransport.write
+
+
+def counting_write(self, data):
+    global server_writes
+    if threading.current_thread().name == "server":
+        server_writes += 1
+    return _write(self, data)
+
+
+selector_events._SelectorSocketTransport.write = counting_write
+
+
+def start_server() -> str:
+    limits.RATE_LIMIT_ENABLED = False  # Bots play far faster than the per-connection budgets allow
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+
+    server = uvicorn.Server(uvicorn.Config(main.app, host="127.0.0.1", port=port, loop="asyncio", log_level="warning"))
+    threading.Thread(target=server.run, name="server", daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return f"ws://127.0.0.1:{port}/ws/"
+
+
+class Bot:
+    """A seated player that bids 1NT or passes and plays the first legal card"""
+
+    def __init__(self, seat: int, batch: bool):
+        self.seat = seat
+        self.batch = batch
+        self.frames = 0
+        self.hand = []
+        self.dummy_hand = []
+        self.declarer = None
+        self.dummy = None
+        self.lead_suit = None
+        self.bid_made = False
+        self.done = asyncio.Event()
+
+    def pick(self, hand):
+        follow = [c for c in hand if SUITS[(c - 1) // 13] == self.lead_suit]
+        return (follow or hand)[0]
+
+    async def act(self, current_player: int, phase: str):
+        if phase == "bidding" and current_player == self.seat:
+            if self.bid_made:
+                await self.ws.send(f"bid:0:Pass:bot:{self.seat}:Pass")
+            else:
+                await self.ws.send(f"bid:1:NT:bot:{self.seat}:1NT")
+        elif phase == "playing":
+            if current_player == self.seat and self.seat != self.dummy:
+                hand = self.hand
+            elif current_player == self.dummy and self.seat == self.declarer:
+                hand = self.dummy_hand
+            else:
+                return
+            card = self.pick(hand)
+            hand.remove(card)
+            await self.ws.send(f"play:{SUITS[(card - 1) // 13]}:{(card - 1) % 13}:{current_player}")
+
+    async def handle(self, event):
+        kind = event["type"]
+        if kind == "hand":
+            self.hand = event["hand"]
+        elif kind == "game_started":
+            self.phase = "bidding"
+            await self.act(event["current_player"], "bidding")
+        elif kind == "bid":
+            if event["bid"]["level"] > 0:
+                self.bid_made = True
+        elif kind == "bidding_ended":
+            self.phase = "playing"
+            self.declarer = event["contract"]["declarer"]
+            self.dummy = (self.declarer + 2) % 4
+            await self.act(event["current_player"], "playing")
+        elif kind in ["dummy_revealed", "dummy_hand_updated"]:
+            self.dummy_hand = list(event["dummy_hand"])
+        elif kind == "card_played":
+            if self.lead_suit is None:
+                self.lead_suit = event["card"]["suit"]
+        elif kind == "trick_complete":
+            self.lead_suit = None
+        elif kind == "next_player":
+            await self.act(event["current_player"], self.phase)
+        elif kind == "game_over":
+            self.done.set()
+
+    async def run(self):
+        async for raw in self.ws:
+            self.frames += 1
+            message = json.loads(raw)
+            events = message["events"] if message["type"] == "batch" else [message]
+            for event in events:
+                await self.handle(event)
+
+
+async def play_hands(url: str, hands: int, batch: bool):
+    bots = [Bot(seat, batch) for seat in range(4)]
+    for bot in bots:
+        bot.ws = await websockets.connect(url)
+        if batch:
+            await bot.ws.send("caps:batch")
+            await bot.ws.recv()
+
+    await bots[0].ws.send("create:")
+    message = json.loads(await bots[0].ws.recv())
+    code = (message["events"][0] if message["type"] == "batch" else message)["code"]
+    for bot in bots[1:]:
+        await bot.ws.send(f"join:{code}")
+    for bot in bots:
+        await bot.ws.send(f"iam:{DIRECTIONS[bot.seat]}")
+    await asyncio.sleep(0.2)
+
+    tasks = [asyncio.create_task(bot.run()) for bot in bots]
+    frames_before = sum(bot.frames for bot in bots)
+    writes_before = server_writes
+
+    for _ in range(hands):
+        for bot in bots:
+            bot.done.clear()
+            bot.bid_made = False
+        await bots[0].ws.send("start:")
+        await asyncio.wait_for(asyncio.gather(*(bot.done.wait() for bot in bots)), 30)
+    await asyncio.sleep(0.2)
+
+    frames = sum(bot.frames for bot in bots) - frames_before
+    writes = server_writes - writes_before
+    for task in tasks:
+        task.cancel()
+    for bot in bots:
+        await bot.ws.close()
+    return frames / hands, writes / hands
+
+
+async def run(hands: int):
+    url = start_server()
+    for batch in [False, True]:
+        frames, writes = await play_hands(url, hands, batch)
+        label = "batched  " if batch else "unbatched"
+        print(f"{label}: {frames:.0f} frames/hand received by players, {writes:.0f} server socket writes/hand")
+
+
+if __name__ == "__main__":
+    asyncio.run(run(int(sys.argv[1]) if len(sys.argv) > 1 else 20))
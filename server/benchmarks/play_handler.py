@@ -0,0 +1,117 @@
+"""
+Time the play: handler.
+
+Seats four connections at a table in this process, deals, bids 1NT and
+three passes through the real handlers, then plays every hand out with
+the first legal card and times each handle_play call on its own (the
+frames it queues are dropped, nothing is sent). Reports the time per
+play with no spectators and with one.
+
+Usage (from the server directory):
+    python benchmarks/play_handler.py [hands]
+"""
+import io
+import os
+import sys
+import time
+import asyncio
+import contextlib
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from starlette.websockets import WebSocket
+
+import history
+import main
+
+# Keep finished hands in memory so no timed play writes to disk, and anything spilled out of the tree
+history.GAME_HISTORY_MEMORY_LIMIT = None
+history.GAME_HISTORY_SPILL_DIR = "/tmp/bridge_benchmark_spill"
+
+SUITS = ["spades", "hearts", "diamonds", "clubs"]  # Card number order, see handle_play
+
+
+def connection(port: int) -> WebSocket:
+    """A WebSocket with the scope uvicorn would give it, never connected"""
+    scope = {
+        "type": "websocket",
+        "asgi": {"version": "3.0", "spec_version": "2.4"},
+        "http_version": "1.1",
+        "scheme": "ws",
+        "server": ("127.0.0.1", 8000),
+        "client": ("127.0.0.1", port),
+        "root_path": "",
+        "path": "/ws/",
+        "raw_path": b"/ws/",
+        "query_string": b"",
+        "headers": [(b"host", b"127.0.0.1:8000"), (b"upgrade", b"websocket")],
+        "subprotocols": [],
+        "state": {},
+    }
+    return WebSocket(scope, None, None)
+
+
+def first_legal(hand, trick):
+    if trick:
+        lead = SUITS.index(trick[0]["suit"])
+        for card in hand:
+            if (card - 1) // 13 == lead:
+                return card
+    return hand[0]
+
+
+def play_hand(actor: main.GameActor, seats, times):
+    game = actor.game
+    main.handle_start(actor, game.host, "start:")
+    player = game.current_player
+    for call in ["bid:1:NT:{0}:{0}:1NT", "bid:0:Pass:{0}:{0}:Pass", "bid:0:Pass:{0}:{0}:Pass", "bid:0:Pass:{0}:{0}:Pass"]:
+        main.handle_bid(actor, seats[player], call.format(player))
+        player = (player + 1) % 4
+    declarer = game.contract["declarer"]
+    dummy = (declarer + 2) % 4
+    actor.outbox.clear()
+
+    for _ in range(52):
+        player = game.current_player
+        card = first_legal(game.hands[main.DIRECTIONS[player]], game.current_trick)
+        command = f"play:{SUITS[(card - 1) // 13]}:{(card - 1) % 13}:{player}"
+        sender = seats[declarer] if player == dummy else seats[player]
+        start = time.perf_counter()
+        main.handle_play(actor, sender, command)
+        times.append(time.perf_counter() - start)
+        actor.outbox.clear()
+
+
+async def run(hands: int, spectators: int):
+    game = main.Game(f"BENCH{spectators}")
+    main.games[game.game_id] = game
+    actor = main.GameActor(game)
+    seats = [connection(50000 + seat) for seat in range(4)]
+    for seat, websocket in enumerate(seats):
+        main.handle_join(actor, websocket, f"join:{game.game_id}")
+        main.handle_iam(actor, websocket, f"iam:{main.DIRECTIONS[seat]}")
+    game.host = seats[0]
+    for spectator in range(spectators):
+        game.spectators.subscribe(connection(60000 + spectator))
+    actor.outbox.clear()
+
+    times = []
+    with contextlib.redirect_stdout(io.StringIO()):  # Each hand logs its result
+        for _ in range(hands):
+            play_hand(actor, seats, times)
+    await actor.stop()
+    await game.spectators.close()
+    game.game_history.discard()
+    del main.games[game.game_id]
+
+    times.sort()
+    print(
+        f"{spectators} spectator(s): {len(times)} plays, mean {sum(times) / len(times) * 1e6:.1f} us,"
+        f" p50 {times[len(times) // 2] * 1e6:.1f} us, p99 {times[int(len(times) * 0.99)] * 1e6:.1f} us"
+    )
+
+
+if __name__ == "__main__":
+    hands = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    asyncio.run(run(hands, 0))
+    asyncio.run(run(hands, 1))
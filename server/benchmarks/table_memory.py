@@ -0,0 +1,85 @@
+"""
+Measure resident memory per table.
+
+Builds N in-memory tables, each with a number of completed deals, and reports
+the growth in process RSS divided by the number of tables.
+
+Usage (from the server directory):
+    python benchmarks/table_memory.py [tables] [deals]
+"""
+import os
+import sys
+import gc
+import random
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import history
+import main
+
+# Keep spilled records inside a scratch directory
+history.GAME_HISTORY_SPILL_DIR = "/tmp/bridge_benchmark_spill"
+
+
+def rss() -> int:
+    """Resident set size of this process in bytes (Linux)"""
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def build_table(game_id: str, deals: int) -> main.Game:
+    """Play out a number of deals the same way the websocket handlers record them"""
+    game = main.Game(game_id)
+    for _ in range(deals):
+        deck = list(range(1, 53))
+        random.shuffle(deck)
+        for i, direction in enumerate(["north", "east", "south", "west"]):
+            game.hands[direction] = sorted(deck[i * 13:(i + 1) * 13])
+
+        game.bidding_history = []
+        game.play_history = main.PlayLog()
+        for i, (level, suit) in enumerate([(1, "NT"), (0, "Pass"), (0, "Pass"), (0, "Pass")]):
+            game.bidding_history.append({
+                "player": "alpha",
+                "playerIndex": (i + 1) % 4,
+                "level": level,
+                "suit": main.intern_suit(suit),
+                "display": "1NT" if level else "Pass",
+            })
+        game.contract = main.get_final_contract(game.bidding_history)
+
+        for i in range(52):
+            game.play_history.append(deck[i], i % 4)
+
+        vulnerability = main.get_vulnerability(game.game_number)
+        tricks_won = [3, 4, 3, 3]
+        game.game_history.append({
+            "game_number": game.game_number,
+            "timestamp": game.play_history.started,
+            "vulnerability": vulnerability,
+            "bidding_history": game.bidding_history,
+            "contract": game.contract.copy(),
+            "play_history": game.play_history,
+            "tricks_won": tricks_won,
+            "score": main.calculate_score(game.contract, tricks_won, vulnerability),
+            "declarer": game.contract['declarer'],
+            "dummy": (game.contract['declarer'] + 2) % 4,
+        })
+        game.game_number += 1
+    return game
+
+
+if __name__ == "__main__":
+    tables = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    deals = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+
+    gc.collect()
+    before = rss()
+    games = {str(i): build_table(str(i), deals) for i in range(tables)}
+    gc.collect()
+    after = rss()
+
+    print(f"{tables} tables, {deals} completed deal(s) each: {(after - before) / tables:.0f} bytes/table")
+
+    for game in games.values():
+        game.game_history.discard()
@@ -0,0 +1,491 @@
+import os
+import time
+import random
+import asyncio
+import multiprocessing
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional, Tuple
+
+from auction import STRAINS, Auction, call_display
+
+# Configuration
+BOT_DECISION_BUDGET_MS = 200  # Time limit for one bot decision (card play samples deals until it runs out)
+BOT_BUDGET_MARGIN = 0.8  # Fraction of the budget spent sampling, the rest absorbs a slow last sample and returning the result
+BOT_WORKERS = max(1, (os.cpu_count() or 2) - 1)  # Worker processes shared by every bot on the server
+BOT_FALLBACK_BUDGET_MS = 10  # Budget for a decision made in the server process when the pool keeps failing
+
+DIRECTIONS = ["west", "north", "east", "south"]  # Seat index -> direction
+SUITS = ["spades", "hearts", "diamonds", "clubs"]  # Suit index -> name, same order as card numbers
+
+
+# Bidding
+
+def hand_shape(hand: List[int]) -> Tuple[int, List[int]]:
+    """High card points (A=4, K=3, Q=2, J=1) and the length of each suit"""
+    points = 0
+    lengths = [0, 0, 0, 0]
+    for card in hand:
+        suit, rank = divmod(card - 1, 13)
+        lengths[suit] += 1
+        if rank >= 9:
+            points += rank - 8
+    return points, lengths
+
+
+def is_balanced(lengths: List[int]) -> bool:
+    """4-3-3-3, 4-4-3-2 or 5-3-3-2"""
+    return sorted(lengths) in ([3, 3, 3, 4], [2, 3, 4, 4], [2, 3, 3, 5])
+
+
+def cheapest_level(auction: Auction, strain: str) -> int:
+    """Lowest level at which the strain can be bid over the current high bid"""
+    if auction.high_strain is None:
+        return 1
+    if STRAINS[strain] > STRAINS[auction.high_strain]:
+        return auction.high_level
+    return auction.high_level + 1
+
+
+def opening_bid(points: int, lengths: List[int]) -> Optional[Tuple[int, str]]:
+    """Five-card majors, better minor, 15-17 1NT, 20-21 2NT and weak twos"""
+    balanced = is_balanced(lengths)
+    if balanced and 20 <= points <= 21:
+        return 2, "NT"
+    if balanced and 15 <= points <= 17:
+        return 1, "NT"
+    if points >= 12:
+        if max(lengths[0], lengths[1]) >= 5:
+            return 1, "spades" if lengths[0] >= lengths[1] else "hearts"
+        return 1, "diamonds" if lengths[2] > lengths[3] or lengths[2] == lengths[3] == 4 else "clubs"
+    if 6 <= points <= 10:
+        for suit in range(3):
+            if lengths[suit] >= 6:
+                return 2, SUITS[suit]
+    return None
+
+
+def overcall(points: int, lengths: List[int], auction: Auction) -> Optional[Tuple[int, str]]:
+    """1NT with 15-18 balanced, otherwise a five-card suit at the one level or, with 10+, the two level"""
+    if 15 <= points <= 18 and is_balanced(lengths) and cheapest_level(auction, "NT") == 1:
+        return 1, "NT"
+    if 8 <= points <= 16:
+        for suit in sorted(range(4), key=lambda s: (-lengths[s], s)):
+            if lengths[suit] < 5:
+                break
+            level = cheapest_level(auction, SUITS[suit])
+            if level == 1 or (level == 2 and points >= 10):
+                return level, SUITS[suit]
+    return None
+
+
+def partner_points(calls: List[Tuple[int, int, str]], partner: int) -> int:
+    """The fewest points partner can hold for the bids they have made"""
+    side_bids = [(p, level, suit) for p, level, suit in calls if level > 0 and p % 2 == partner % 2]
+    first = next(c for c in side_bids if c[0] == partner)
+    if side_bids[0][0] != partner:
+        # Partner responded to us
+        last = [c for c in side_bids if c[0] == partner][-1]
+        return min(6 + 3 * (last[1] - 1), 13)
+
+    opponents_first = any(level > 0 and p % 2 != partner % 2 for p, level, suit in calls[:calls.index(first)])
+    if first[2] == "NT":
+        return 20 if first[1] == 2 else 15
+    if opponents_first:
+        return 10  # Overcall
+    return 8 if first[1] == 2 else 12
+
+
+def support_bid(points: int, lengths: List[int], seat: int, calls: List[Tuple[int, int, str]], auction: Auction) -> Optional[Tuple[int, str]]:
+    """Raise partner's strain to the level the combined points are worth, or show a suit of our own"""
+    partner = (seat + 2) % 4
+    _, partner_level, strain = [c for c in calls if c[0] == partner and c[1] > 0][-1]
+    mine = [suit for p, level, suit in calls if p == seat and level > 0]
+    total = points + partner_points(calls, partner)
+    balanced = is_balanced(lengths)
+
+    if strain == "NT":
+        major = 0 if lengths[0] >= 6 else 1 if lengths[1] >= 6 else None
+        if major is not None and total >= 25:
+            return 4, SUITS[major]
+        if total >= 33:
+            return 6, "NT"
+        if total >= 25:
+            return 3, "NT"
+        if total >= 23 and partner_level == 1:
+            return 2, "NT"
+        return None
+
+    suit = SUITS.index(strain)
+    fit = lengths[suit] >= (3 if suit < 2 else 4) or strain in mine
+    if fit:
+        if total >= 33:
+            return 6, strain
+        if total >= 25:
+            if suit < 2:
+                return 4, strain
+            return (3, "NT") if balanced else (5, strain)
+        if total >= 22:
+            return 3, strain
+        if total >= 18:
+            return 2, strain
+        return None
+
+    if total >= 25 and balanced:
+        return 3, "NT"
+    if not mine and points >= 6:
+        for own in sorted(range(4), key=lambda s: (-lengths[s], s)):
+            if lengths[own] < 4:
+                break
+            level = cheapest_level(auction, SUITS[own])
+            if level == 1 or (level == 2 and lengths[own] >= 5 and points >= 10):
+                return level, SUITS[own]
+        if points <= 10 and cheapest_level(auction, "NT") == 1:
+            return 1, "NT"
+    # Rebid a six-card suit we opened rather than leave partner in a misfit
+    for own in mine:
+        if own != "NT" and lengths[SUITS.index(own)] >= 6 and cheapest_level(auction, own) <= 2:
+            return cheapest_level(auction, own), own
+    return None
+
+
+def choose_call(hand: List[int], seat: int, calls: List[Tuple[int, int, str]]) -> Tuple[int, str]:
+    """Pick a call for seat given the calls so far as (player, level, suit)"""
+    auction = Auction()
+    for player, level, suit in calls:
+        auction.apply(player, level, suit)
+
+    points, lengths = hand_shape(hand)
+    partner = (seat + 2) % 4
+    ours = [c for c in calls if c[1] > 0 and c[0] % 2 == seat % 2]
+    theirs = [c for c in calls if c[1] > 0 and c[0] % 2 != seat % 2]
+
+    if not ours:
+        target = overcall(points, lengths, auction) if theirs else opening_bid(points, lengths)
+    elif any(c[0] == partner for c in ours):
+        target = support_bid(points, lengths, seat, calls, auction)
+    else:
+        target = None  # Partner passed our bid
+
+    if target and auction.validate(seat, target[0], target[1]) is None:
+        return target
+    return 0, "Pass"
+
+
+# Card play
+
+def trick_winner(trick: List[Tuple[int, int, int]], trump: Optional[int]) -> Tuple[int, int, int]:
+    """The winning (suit, rank, player) of a trick in progress"""
+    winner = trick[0]
+    for played in trick[1:]:
+        if played[0] == winner[0]:
+            if played[1] > winner[1]:
+                winner = played
+        elif played[0] == trump:
+            winner = played
+    return winner
+
+
+def greedy_card(hands: List[List[List[int]]], player: int, trick: List[Tuple[int, int, int]], trump: Optional[int]) -> Tuple[int, int]:
+    """
+    Fast playout policy: cash a top card when leading, otherwise lead low from
+    the longest suit; win as cheaply as possible unless partner is winning;
+    ruff when void and discard from the longest side suit.
+    """
+    hand = hands[player]
+    if not trick:
+        for suit in range(4):
+            ranks = hand[suit]
+            if ranks and suit != trump and all(
+                not other[suit] or other[suit][-1] < ranks[-1] for seat, other in enumerate(hands) if seat != player
+            ):
+                return suit, ranks[-1]
+        suit = max((s for s in range(4) if hand[s]), key=lambda s: (len(hand[s]), s != trump))
+        return suit, hand[suit][0]
+
+    lead = trick[0][0]
+    win_suit, win_rank, win_player = trick_winner(trick, trump)
+    partner_winning = win_player % 2 == player % 2
+    ranks = hand[lead]
+    if ranks:
+        if not partner_winning and win_suit == lead:
+            i = bisect_right(ranks, win_rank)
+            if i < len(ranks):
+                return lead, ranks[i]
+        return lead, ranks[0]
+
+    if trump is not None and hand[trump] and not partner_winning:
+        trumps = hand[trump]
+        if win_suit != trump:
+            return trump, trumps[0]
+        i = bisect_right(trumps, win_rank)
+        if i < len(trumps):
+            return trump, trumps[i]
+
+    suit = max((s for s in range(4) if hand[s] and s != trump), key=lambda s: len(hand[s]), default=trump)
+    return suit, hand[suit][0]
+
+
+def playout(hands: List[List[List[int]]], trick: List[Tuple[int, int, int]], player: int, trump: Optional[int], side: int) -> int:
+    """Play the deal out with greedy_card, returning the tricks won by side from the current trick on"""
+    won = 0
+    while True:
+        while len(trick) < 4:
+            suit, rank = greedy_card(hands, player, trick, trump)
+            hands[player][suit].remove(rank)
+            trick.append((suit, rank, player))
+            player = (player + 1) % 4
+        player = trick_winner(trick, trump)[2]
+        if player % 2 == side:
+            won += 1
+        if not any(hands[player]):
+            return won
+        trick = []
+
+
+def sample_hidden(unknown: List[int], counts: Dict[int, int], voids: Dict[int, set], rng: random.Random) -> Dict[int, List[int]]:
+    """Deal the unseen cards to the hidden seats, respecting their card counts and known voids"""
+    for attempt in range(20):
+        cards = unknown[:]
+        rng.shuffle(cards)
+        if attempt < 19:
+            # Cards only some seats can hold go first so the others don't fill up with them
+            cards.sort(key=lambda card: sum((card - 1) // 13 in voids[p] for p in counts), reverse=True)
+        dealt = {p: [] for p in counts}
+        for card in cards:
+            suit = (card - 1) // 13
+            eligible = [p for p in counts if len(dealt[p]) < counts[p] and (attempt == 19 or suit not in voids[p])]
+            if not eligible:
+                break
+            weights = [counts[p] - len(dealt[p]) for p in eligible]
+            dealt[rng.choices(eligible, weights)[0]].append(card)
+        else:
+            return dealt
+    return dealt
+
+
+def candidate_cards(hand: List[int], trick_cards: List[int], played: set) -> List[int]:
+    """Legal cards, keeping one card from each run that is equivalent once played cards are removed"""
+    legal = hand
+    if trick_cards:
+        lead = (trick_cards[0] - 1) // 13
+        legal = [c for c in hand if (c - 1) // 13 == lead] or hand
+
+    candidates = []
+    for card in sorted(legal):
+        previous = candidates[-1] if candidates else None
+        if previous is not None and (previous - 1) // 13 == (card - 1) // 13 and all(c in played for c in range(previous + 1, card)):
+            candidates[-1] = card  # Touching in effect, keep the higher
+            continue
+        candidates.append(card)
+    return candidates
+
+
+def choose_card(
+    seat: int, acting: int, trump: Optional[str], known: Dict[int, List[int]], plays: bytes,
+    budget_ms: float, requested: Optional[float] = None,
+) -> int:
+    """
+    Single-dummy Monte Carlo: deal the unseen cards to the hidden hands many
+    times, play each candidate card out with the greedy policy and keep the
+    one that wins the most tricks on average, until the time budget runs out.
+    The budget counts from requested (time.monotonic() when the decision was
+    asked for, so time spent queueing for a worker counts), default now.
+    """
+    if requested is None:
+        requested = time.monotonic()
+    deadline = requested + budget_ms / 1000 * BOT_BUDGET_MARGIN
+    trump_index = SUITS.index(trump) if trump else None
+
+    played = set()
+    played_by = [0, 0, 0, 0]
+    voids = {p: set() for p in range(4)}
+    for i, packed in enumerate(plays):
+        card, player = packed >> 2, packed & 3
+        played.add(card)
+        played_by[player] += 1
+        lead = (plays[i - i % 4] >> 2) - 1
+        if (card - 1) // 13 != lead // 13:
+            voids[player].add(lead // 13)
+
+    in_trick = len(plays) % 4
+    trick_cards = [packed >> 2 for packed in plays[len(plays) - in_trick:]]
+    trick = [(((packed >> 2) - 1) // 13, ((packed >> 2) - 1) % 13, packed & 3) for packed in plays[len(plays) - in_trick:]]
+
+    candidates = candidate_cards(known[acting], trick_cards, played)
+    if len(candidates) == 1:
+        return candidates[0]
+
+    seen = played.union(*known.values())
+    unknown = [c for c in range(1, 53) if c not in seen]
+    counts = {p: 13 - played_by[p] for p in range(4) if p not in known}
+    side = seat % 2
+    rng = random.Random()
+    totals = dict.fromkeys(candidates, 0)
+
+    # Stop before a sample that could overrun the budget, none at all if it ran out in the queue
+    slowest = 0.0
+    while time.monotonic() + slowest <= deadline:
+        sample_start = time.monotonic()
+        deal = dict(known)
+        deal.update(sample_hidden(unknown, counts, voids, rng))
+        by_suit = [[[] for _ in range(4)] for _ in range(4)]
+        for p, cards in deal.items():
+            for card in sorted(cards):
+                by_suit[p][(card - 1) // 13].append((card - 1) % 13)
+
+        for card in candidates:
+            hands = [[ranks[:] for ranks in hand] for hand in by_suit]
+            suit, rank = divmod(card - 1, 13)
+            hands[acting][suit].remove(rank)
+            totals[card] += playout(hands, trick + [(suit, rank, acting)], (acting + 1) % 4, trump_index, side)
+        slowest = max(slowest, time.monotonic() - sample_start)
+
+    return max(candidates, key=lambda card: totals[card])
+
+
+def decide(state: Dict) -> str:
+    """Run in a worker process: turn a snapshot of the table into the bot's next command"""
+    seat = state["seat"]
+    if state["phase"] == "bidding":
+        level, suit = choose_call(state["hand"], seat, state["calls"])
+        return f"bid:{level}:{suit}:{DIRECTIONS[seat].capitalize()}:{seat}:{call_display(level, suit)}"
+
+    card = choose_card(
+        seat, state["acting"], state["trump"],
+        state["known"], state["plays"], state["budget_ms"], state["requested"],
+    )
+    return f"play:{SUITS[(card - 1) // 13]}:{(card - 1) % 13}:{state['acting']}"
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_pool() -> ProcessPoolExecutor:
+    """The shared worker pool, started on first use"""
+    global _pool
+    if _pool is None:
+        # Spawned workers only import this module, not the server
+        _pool = ProcessPoolExecutor(max_workers=BOT_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+def reset_pool(broken: ProcessPoolExecutor):
+    """Drop a broken pool (a worker died), the next get_pool() starts a new one"""
+    global _pool
+    broken.shutdown(wait=False, cancel_futures=True)
+    # Other bots may have seen the same failure and already replaced it
+    if _pool is broken:
+        _pool = None
+
+
+def shutdown_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=True, cancel_futures=True)
+        _pool = None
+
+
+class BotPlayer:
+    """
+    A computer player occupying a seat.
+    It stands in for a WebSocket: the game actor delivers its messages
+    through send_text like any other connection, and it answers by posting
+    bid: and play: commands to the same mailbox, so its calls and cards go
+    through the usual validation. Decisions run in the worker pool.
+    """
+
+    __slots__ = ("actor", "seat", "task", "pending", "stopped")
+
+    def __init__(self, actor, seat: int):
+        self.actor = actor
+        self.seat: int = seat  # 0=West, 1=North, 2=East, 3=South
+        self.task: Optional[asyncio.Task] = None
+        self.pending: Optional[Tuple[int, int, int]] = None  # Decision point the bot last acted on
+        self.stopped: bool = False
+
+    async def send_text(self, text: str):
+        # Anything that happens at the table may have made it our turn
+        if text.startswith('{"type": "error"'):
+            print(f"Bot {DIRECTIONS[self.seat]} in game {self.actor.game.game_id}: {text}")
+        self.schedule()
+
+    def decision_point(self) -> Tuple[int, int, int]:
+        game = self.actor.game
+        return game.game_number, len(game.bidding_history), len(game.play_history)
+
+    def snapshot(self) -> Optional[Dict]:
+        """What the bot can see when it is its turn to act, None otherwise"""
+        game = self.actor.game
+        if game.game_phase == "bidding":
+            if game.current_player != self.seat or game.auction.ended:
+                return None
+            return {
+                "phase": "bidding",
+                "seat": self.seat,
+                "hand": list(game.hands[DIRECTIONS[self.seat]]),
+                "calls": [(b["playerIndex"], b["level"], b["suit"]) for b in game.bidding_history],
+            }
+
+        if game.game_phase != "playing" or not game.contract or len(game.play_history) == 52:
+            return None
+        dummy = game.dummy
+        # Declarer plays dummy's cards
+        acting = game.declarer if game.current_player == dummy else game.current_player
+        if acting != self.seat:
+            return None
+
+        known = {self.seat: list(game.hands[DIRECTIONS[self.seat]])}
+        if game.dummy_revealed:
+            known[dummy] = list(game.hands[DIRECTIONS[dummy]])
+        return {
+            "phase": "playing",
+            "seat": self.seat,
+            "acting": game.current_player,
+            "trump": game.trump_suit,
+            "known": known,
+            "plays": bytes(game.play_history.cards),
+            "budget_ms": BOT_DECISION_BUDGET_MS,
+            "requested": time.monotonic(),  # Same clock in the workers, they run on this machine
+        }
+
+    def schedule(self):
+        point = self.decision_point()
+        if self.stopped or point == self.pending:
+            return
+        state = self.snapshot()
+        if state is None:
+            return
+        self.pending = point
+        self.task = asyncio.create_task(self.decide(point, state))
+
+    async def decide(self, point: Tuple[int, int, int], state: Dict):
+        command = None
+        for attempt in range(2):
+            pool = get_pool()
+            try:
+                command = await asyncio.get_running_loop().run_in_executor(pool, decide, state)
+                break
+            except BrokenProcessPool as e:
+                print(f"Bot {DIRECTIONS[self.seat]} lost its worker, restarting the pool: {e}")
+                reset_pool(pool)
+            except Exception as e:
+                print(f"Bot {DIRECTIONS[self.seat]} failed to decide: {e}")
+
+        if command is None:
+            # Decide here with a small budget rather than stall the table
+            try:
+                command = decide(dict(state, budget_ms=BOT_FALLBACK_BUDGET_MS, requested=time.monotonic()))
+            except Exception as e:
+                print(f"Bot {DIRECTIONS[self.seat]} failed to decide in process: {e}")
+                self.pending = None  # The next message to the bot tries again
+                return
+        # The table may have moved on while the bot was thinking
+        if not self.stopped and self.decision_point() == point:
+            self.actor.post(self, command)
+
+    def stop(self):
+        self.stopped = True
+        if self.task is not None:
+            self.task.cancel()
@@ -0,0 +1,89 @@
+from typing import List
+
+from websockets.frames import CONT, CTRL_OPCODES, Frame
+from websockets.extensions.permessage_deflate import PerMessageDeflate, ServerPerMessageDeflateFactory
+from uvicorn.protocols.websockets.websockets_sansio_impl import WebSocketsSansIOProtocol
+
+# Configuration
+WS_DEFLATE_ENABLED = True  # Negotiate permessage-deflate with clients that offer it
+WS_DEFLATE_MIN_SIZE = 64  # Messages shorter than this many bytes are sent uncompressed
+WS_DEFLATE_LEVEL = 6  # zlib compression level (1 = fastest, 9 = smallest)
+WS_DEFLATE_MEM_LEVEL = 5  # zlib memLevel (1-9), sets the size of the compressor's hash table
+WS_DEFLATE_SERVER_MAX_WINDOW_BITS = 12  # LZ77 window for messages we send (9-15)
+WS_DEFLATE_CLIENT_MAX_WINDOW_BITS = 12  # LZ77 window we ask clients to use (8-15)
+WS_DEFLATE_CONTEXT_TAKEOVER = True  # Keep the window between messages (better ratio, memory held per connection)
+
+
+class SelectivePerMessageDeflate(PerMessageDeflate):
+    """
+    permessage-deflate that leaves short messages uncompressed.
+    RFC 7692 lets each message choose by its RSV1 bit, so frames like
+    next_player go out as-is instead of paying for a deflate call that
+    can't make them any smaller. Skipped messages never touch the
+    compressor, so the shared window stays valid.
+    """
+
+    def __init__(self, *args, min_size: int = WS_DEFLATE_MIN_SIZE, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.min_size = min_size
+        self.skip_cont_data = False  # The message being continued was sent uncompressed
+
+    def encode(self, frame: Frame) -> Frame:
+        if frame.opcode in CTRL_OPCODES:
+            return frame
+
+        if frame.opcode is CONT:
+            if self.skip_cont_data:
+                self.skip_cont_data = not frame.fin
+                return frame
+        elif len(frame.data) < self.min_size:
+            self.skip_cont_data = not frame.fin
+            return frame
+
+        return super().encode(frame)
+
+
+class SelectiveDeflateFactory(ServerPerMessageDeflateFactory):
+    """Negotiates permessage-deflate as usual but hands out SelectivePerMessageDeflate"""
+
+    def __init__(self, min_size: int = WS_DEFLATE_MIN_SIZE, **kwargs):
+        super().__init__(**kwargs)
+        self.min_size = min_size
+
+    def process_request_params(self, params, accepted_extensions):
+        response_params, extension = super().process_request_params(params, accepted_extensions)
+        return response_params, SelectivePerMessageDeflate(
+            extension.remote_no_context_takeover,
+            extension.local_no_context_takeover,
+            extension.remote_max_window_bits,
+            extension.local_max_window_bits,
+            extension.compress_settings,
+            min_size=self.min_size,
+        )
+
+
+def deflate_extensions() -> List[ServerPerMessageDeflateFactory]:
+    """Server extensions for the configured compression policy"""
+    if not WS_DEFLATE_ENABLED:
+        return []
+    return [SelectiveDeflateFactory(
+        min_size=WS_DEFLATE_MIN_SIZE,
+        server_no_context_takeover=not WS_DEFLATE_CONTEXT_TAKEOVER,
+        server_max_window_bits=WS_DEFLATE_SERVER_MAX_WINDOW_BITS,
+        client_max_window_bits=WS_DEFLATE_CLIENT_MAX_WINDOW_BITS,
+        compress_settings={"level": WS_DEFLATE_LEVEL, "memLevel": WS_DEFLATE_MEM_LEVEL},
+    )]
+
+
+class WebSocketProtocol(WebSocketsSansIOProtocol):
+    """
+    uvicorn's sans-I/O websockets protocol (what --ws auto picks) with our compression policy.
+    Select it with `uvicorn main:app --ws compression:WebSocketProtocol`;
+    uvicorn's --ws-per-message-deflate false still turns compression off.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Extensions are only negotiated during the handshake, so the factories can still be swapped here
+        if self.config.ws_per_message_deflate:
+            self.conn.available_extensions = deflate_extensions()
@@ -0,0 +1,194 @@
+import os
+import hmac
+import json
+import time
+import hashlib
+import secrets
+from collections import deque
+from string import ascii_letters
+from typing import Deque, Dict, Optional, Set, Tuple
+
+# Configuration
+GAME_CODE_ALPHABET = '0123456789' + ascii_letters
+GAME_CODE_LENGTH = 6  # Must be even, the permutation works on two halves of the code
+GAME_CODE_QUARANTINE = 24 * 3600  # Seconds before a released code can be handed out again
+GAME_CODE_SECRET = os.environ.get("GAME_CODE_SECRET")  # Key for the code permutation (random per process if unset)
+GAME_CODE_ROUNDS = 4  # Feistel rounds
+GAME_CODE_RESERVATION_TTL = 7 * 24 * 3600  # Seconds an unclaimed reservation is held by default
+GAME_CODE_RESERVATION_MAX_TTL = 30 * 24 * 3600  # Longest hold a reservation can ask for
+GAME_CODE_ADMIN_TOKEN = os.environ.get("GAME_CODE_ADMIN_TOKEN")  # Bearer token for the reservation endpoints (disabled if unset)
+
+
+class GameCodeAllocator:
+    """
+    Hands out unique game codes in O(1).
+    A counter is run through a keyed Feistel permutation of the whole code
+    space, so every counter value maps to a distinct, unpredictable code
+    without any collision retries. The counter starts at a random point on
+    each boot, so a restarted server with the same secret doesn't hand out
+    the codes of games that existed before the restart. Released codes wait
+    in a FIFO quarantine before being reused, and codes can be reserved ahead
+    of time for scheduled games; a reservation that isn't claimed in time
+    lapses. Reservations are saved to reservations_path, if given, so they
+    survive a restart.
+    """
+
+    def __init__(self, secret: Optional[bytes] = None, reservations_path: Optional[str] = None):
+        self.base = len(GAME_CODE_ALPHABET)
+        self.half = self.base ** (GAME_CODE_LENGTH // 2)  # Size of each Feistel half
+        self.size = self.half * self.half  # Total number of codes
+        if secret is None:
+            secret = GAME_CODE_SECRET.encode() if GAME_CODE_SECRET else os.urandom(32)
+        self.key = hashlib.blake2b(secret, digest_size=32).digest()
+
+        self.start = secrets.randbelow(self.size)  # Counter value of the first fresh code this boot
+        self.counter: int = 0  # Fresh codes taken so far, the next one permutes start + counter
+        self.active: Set[str] = set()  # Codes of games that currently exist
+        self.reserved: Dict[str, Tuple[str, float]] = {}  # Reserved code -> (claim token, expiry time)
+        self.quarantine: Deque[Tuple[float, str]] = deque()  # (release time, code), oldest first
+        self.quarantined: Set[str] = set()
+
+        self.reservations_path = reservations_path
+        if reservations_path:
+            self._load_reservations()
+
+    def _load_reservations(self):
+        now = time.time()
+        try:
+            with open(self.reservations_path) as f:
+                saved = json.load(f)
+            for code, (token, expires) in saved.items():
+                if expires > now and self.is_valid(code):
+                    self.reserved[code] = (str(token), float(expires))
+        except FileNotFoundError:
+            return
+        except (OSError, TypeError, ValueError, AttributeError) as e:
+            print(f"Warning: could not load game code reservations from {self.reservations_path}: {e}")
+            return
+        print(f"Loaded {len(self.reserved)} game code reservation(s) from {self.reservations_path}")
+
+    def _save_reservations(self):
+        """Write the reservations out, through a temporary file so a crash never leaves half a file"""
+        if not self.reservations_path:
+            return
+        try:
+            directory = os.path.dirname(self.reservations_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            temporary = self.reservations_path + ".tmp"
+            with open(temporary, 'w') as f:
+                json.dump(self.reserved, f)
+            os.replace(temporary, self.reservations_path)
+        except OSError as e:
+            print(f"Warning: could not save game code reservations to {self.reservations_path}: {e}")
+
+    def _round(self, value: int, round_number: int) -> int:
+        digest = hashlib.blake2b(
+            value.to_bytes(4, 'big'),
+            key=self.key,
+            digest_size=8,
+            salt=round_number.to_bytes(16, 'big'),
+        ).digest()
+        return int.from_bytes(digest, 'big') % self.half
+
+    def _permute(self, n: int) -> int:
+        """Keyed bijection on [0, size)"""
+        left, right = divmod(n, self.half)
+        for round_number in range(GAME_CODE_ROUNDS):
+            left, right = right, (left + self._round(right, round_number)) % self.half
+        return left * self.half + right
+
+    def _encode(self, n: int) -> str:
+        chars = []
+        for _ in range(GAME_CODE_LENGTH):
+            n, digit = divmod(n, self.base)
+            chars.append(GAME_CODE_ALPHABET[digit])
+        return ''.join(reversed(chars))
+
+    def _is_free(self, code: str) -> bool:
+        return code not in self.active and code not in self.reserved and code not in self.quarantined
+
+    def _next_code(self) -> str:
+        """Take a reusable code whose quarantine has expired, otherwise a fresh one from the counter"""
+        if self.quarantine and time.time() - self.quarantine[0][0] >= GAME_CODE_QUARANTINE:
+            _, code = self.quarantine.popleft()
+            self.quarantined.discard(code)
+            return code
+
+        # Fresh codes never repeat, they can only clash with a code reserved by name
+        while True:
+            if self.counter >= self.size:
+                raise RuntimeError("Game code space exhausted")
+            code = self._encode(self._permute((self.start + self.counter) % self.size))
+            self.counter += 1
+            if self._is_free(code):
+                return code
+
+    def allocate(self) -> str:
+        """Get a unique code for a new game"""
+        code = self._next_code()
+        self.active.add(code)
+        return code
+
+    def reserve(self, code: Optional[str] = None, ttl: Optional[float] = None) -> Tuple[str, str, float]:
+        """
+        Reserve a code for a scheduled game, either a specific one or the next free one,
+        for ttl seconds (GAME_CODE_RESERVATION_TTL by default).
+        Returns (code, token, expiry time); the token is needed to claim the code later.
+        """
+        if ttl is None:
+            ttl = GAME_CODE_RESERVATION_TTL
+        elif not 0 < ttl <= GAME_CODE_RESERVATION_MAX_TTL:
+            raise ValueError("Invalid reservation time")
+        self.expire_reservations()
+
+        if code is None:
+            code = self._next_code()
+        elif not self.is_valid(code):
+            raise ValueError("Invalid game code")
+        elif not self._is_free(code):
+            raise ValueError("Game code is not available")
+
+        token = secrets.token_urlsafe(16)
+        expires = time.time() + ttl
+        self.reserved[code] = (token, expires)
+        self._save_reservations()
+        return code, token, expires
+
+    def claim(self, code: str, token: str) -> bool:
+        """Turn a reservation into an active game code, returns False if the token doesn't match or it has lapsed"""
+        reservation = self.reserved.get(code)
+        if reservation is None or not hmac.compare_digest(reservation[0], token):
+            return False
+        if time.time() >= reservation[1]:
+            self.cancel_reservation(code)
+            return False
+        del self.reserved[code]
+        self._save_reservations()
+        self.active.add(code)
+        return True
+
+    def expire_reservations(self):
+        """Drop reservations that weren't claimed in time"""
+        now = time.time()
+        for code in [code for code, (_, expires) in self.reserved.items() if now >= expires]:
+            self.cancel_reservation(code)
+
+    def cancel_reservation(self, code: str):
+        """Drop a reservation that will not be used, the code goes through quarantine like any other"""
+        if self.reserved.pop(code, None) is not None:
+            self._quarantine(code)
+            self._save_reservations()
+
+    def release(self, code: str):
+        """Mark a game's code as no longer in use"""
+        if code in self.active:
+            self.active.remove(code)
+            self._quarantine(code)
+
+    def _quarantine(self, code: str):
+        self.quarantine.append((time.time(), code))
+        self.quarantined.add(code)
+
+    def is_valid(self, code: str) -> bool:
+        return len(code) == GAME_CODE_LENGTH and all(c in GAME_CODE_ALPHABET for c in code)
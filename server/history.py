@@ -0,0 +1,130 @@
+import os
+import sys
+import time
+import json
+import uuid
+from array import array
+from typing import Dict, List, Optional
+
+# Configuration
+GAME_HISTORY_MEMORY_LIMIT = 4  # Completed games kept in memory per table before spilling to disk (None = unlimited)
+GAME_HISTORY_SPILL_DIR = "game_history/spill"  # Directory for spilled game records
+
+# Interned suit names, indexed the same way as card numbers (spades=0 ... clubs=3)
+SUITS = tuple(sys.intern(s) for s in ["spades", "hearts", "diamonds", "clubs"])
+SUIT_NAMES = {s: s for s in SUITS + tuple(sys.intern(s) for s in ["NT", "Pass", "Double", "Redouble"])}
+
+
+def intern_suit(suit: str) -> str:
+    """Return the shared copy of a suit or call name so per-bid and per-card dicts don't hold their own"""
+    return SUIT_NAMES.get(suit, suit)
+
+
+class PlayLog:
+    """
+    Compact log of the cards played in one deal.
+    Each play is one byte (card number << 2 | player) plus a millisecond
+    offset from the start of the deal, timed with the monotonic clock so a
+    wall clock stepping back can't make it negative; trick number and
+    position in the trick follow from the play's index since every trick
+    has four cards.
+    """
+
+    __slots__ = ("started", "clock", "cards", "offsets")
+
+    def __init__(self):
+        self.started: float = time.time()  # Wall clock, only used to timestamp exported plays
+        self.clock: float = time.monotonic()
+        self.cards = bytearray()
+        self.offsets = array("I")
+
+    def __len__(self) -> int:
+        return len(self.cards)
+
+    def append(self, card_number: int, player: int):
+        """Record a card (1-52) played by a player (0=West, 1=North, 2=East, 3=South)"""
+        self.cards.append(card_number << 2 | player)
+        self.offsets.append(int((time.monotonic() - self.clock) * 1000))
+
+    def to_list(self) -> List[Dict]:
+        """Expand into the play history format used in saved game records"""
+        plays = []
+        for i, packed in enumerate(self.cards):
+            card_number = packed >> 2
+            plays.append({
+                "trick_number": i // 4 + 1,
+                "card_in_trick": i % 4 + 1,
+                "suit": SUITS[(card_number - 1) // 13],
+                "rank": (card_number - 1) % 13,
+                "player": packed & 3,
+                "timestamp": self.started + self.offsets[i] / 1000,
+            })
+        return plays
+
+
+def encode_record(record: Dict) -> Dict:
+    """Convert an in-memory game record to its JSON form"""
+    if isinstance(record["play_history"], PlayLog):
+        record = dict(record, play_history=record["play_history"].to_list())
+    return record
+
+
+class GameHistory:
+    """
+    Completed games for one table.
+    Only the most recent GAME_HISTORY_MEMORY_LIMIT records stay in memory,
+    older ones are appended to a JSON lines file and read back on export.
+    """
+
+    __slots__ = ("name", "records", "spilled", "spill_path")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.records: List[Dict] = []
+        self.spilled: int = 0  # Number of records written to the spill file
+        self.spill_path: Optional[str] = None
+
+    def __len__(self) -> int:
+        return self.spilled + len(self.records)
+
+    def append(self, record: Dict):
+        self.records.append(record)
+        if GAME_HISTORY_MEMORY_LIMIT is not None and len(self.records) > GAME_HISTORY_MEMORY_LIMIT:
+            self.spill(len(self.records) - GAME_HISTORY_MEMORY_LIMIT)
+
+    def spill(self, count: int):
+        """Move the oldest records to disk, keeping them in memory if the write fails"""
+        try:
+            if self.spill_path is None:
+                os.makedirs(GAME_HISTORY_SPILL_DIR, exist_ok=True)
+                self.spill_path = f"{GAME_HISTORY_SPILL_DIR}/game_{self.name}_{uuid.uuid4().hex[:8]}.jsonl"
+
+            with open(self.spill_path, 'a') as f:
+                for record in self.records[:count]:
+                    f.write(json.dumps(encode_record(record)) + "\n")
+
+            del self.records[:count]
+            self.spilled += count
+        except Exception as e:
+            print(f"Error spilling game history: {e}")
+
+    def to_list(self) -> List[Dict]:
+        """All completed games in order, including spilled ones"""
+        games = []
+        if self.spill_path is not None:
+            try:
+                with open(self.spill_path) as f:
+                    games.extend(json.loads(line) for line in f)
+            except Exception as e:
+                print(f"Error reading spilled game history: {e}")
+        games.extend(encode_record(record) for record in self.records)
+        return games
+
+    def discard(self):
+        """Delete the spill file once the history is no longer needed"""
+        if self.spill_path is not None:
+            try:
+                os.remove(self.spill_path)
+            except OSError:
+                pass
+            self.spill_path = None
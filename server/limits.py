@@ -0,0 +1,147 @@
+import os
+import time
+from typing import Any, Dict, Optional, Tuple
+
+# Configuration
+RATE_LIMIT_ENABLED = True  # Apply the token buckets below to every WebSocket message
+RATE_LIMITS: Dict[str, Tuple[float, float]] = {  # Command -> (burst, tokens per second) for one connection
+    "create": (3, 0.2),
+    "join": (5, 1.0),
+    "watch": (5, 1.0),
+    "start": (5, 1.0),
+    "bid": (10, 4.0),
+    "play": (10, 4.0),
+}
+RATE_LIMIT_DEFAULT = (20, 10.0)  # Budget for every other message, unknown commands included
+RATE_LIMIT_CONNECTIONS = (20, 2.0)  # New connections per address (burst, per second), refused before the handshake
+RATE_LIMIT_PER_ADDRESS = 8  # An address may use this many connections' worth of each budget (shared NATs, open tabs)
+RATE_LIMIT_DISCONNECT_AFTER = 50  # Consecutive rejected messages before the connection is closed
+MAX_TABLES = 10000  # New games are refused at this many tables (None = no limit)
+MAX_MEMORY_MB = 1024  # New games and joins are refused above this resident memory (None = no limit)
+MEMORY_CHECK_INTERVAL = 1.0  # Seconds a resident memory reading is reused for
+
+
+class TokenBucket:
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, burst: float, now: float):
+        self.tokens: float = burst
+        self.updated: float = now
+
+    def refill(self, burst: float, rate: float, now: float):
+        self.tokens = min(burst, self.tokens + (now - self.updated) * rate)
+        self.updated = now
+
+    def take(self, burst: float, rate: float, now: float) -> bool:
+        """Spend one token if there is one"""
+        self.refill(burst, rate, now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+class RateLimiter:
+    """
+    Token buckets per connection and per client address, with a separate
+    budget for each command so a flood of one kind of message can't starve
+    the others. A message must get a token from both its connection's and
+    its address's bucket; reconnecting doesn't reset the address's buckets.
+    """
+
+    def __init__(self):
+        self.connections: Dict[Any, Dict[str, TokenBucket]] = {}
+        self.addresses: Dict[str, Dict[str, TokenBucket]] = {}
+        self.rejected: Dict[Any, int] = {}  # Consecutive rejections per connection
+
+    def allow(self, connection: Any, address: str, command: str) -> bool:
+        """Whether a message may be processed, spending its tokens if so"""
+        if not RATE_LIMIT_ENABLED:
+            return True
+
+        burst, rate = RATE_LIMITS.get(command, RATE_LIMIT_DEFAULT)
+        key = command if command in RATE_LIMITS else ""
+        now = time.monotonic()
+
+        buckets = self.connections.setdefault(connection, {})
+        bucket = buckets.get(key)
+        if bucket is None:
+            bucket = buckets[key] = TokenBucket(burst, now)
+        if bucket.take(burst, rate, now):
+            shared = self.addresses.setdefault(address, {})
+            address_bucket = shared.get(key)
+            if address_bucket is None:
+                address_bucket = shared[key] = TokenBucket(burst * RATE_LIMIT_PER_ADDRESS, now)
+            if address_bucket.take(burst * RATE_LIMIT_PER_ADDRESS, rate * RATE_LIMIT_PER_ADDRESS, now):
+                self.rejected.pop(connection, None)
+                return True
+            bucket.tokens += 1  # Not spent after all
+
+        self.rejected[connection] = self.rejected.get(connection, 0) + 1
+        return False
+
+    def allow_connection(self, address: str) -> bool:
+        """Whether an address may open another connection"""
+        if not RATE_LIMIT_ENABLED:
+            return True
+        burst, rate = RATE_LIMIT_CONNECTIONS
+        now = time.monotonic()
+        buckets = self.addresses.setdefault(address, {})
+        bucket = buckets.get("connect")
+        if bucket is None:
+            bucket = buckets["connect"] = TokenBucket(burst, now)
+        return bucket.take(burst, rate, now)
+
+    def should_disconnect(self, connection: Any) -> bool:
+        return self.rejected.get(connection, 0) >= RATE_LIMIT_DISCONNECT_AFTER
+
+    def forget(self, connection: Any):
+        """Drop a closed connection's buckets, its address keeps its own"""
+        self.connections.pop(connection, None)
+        self.rejected.pop(connection, None)
+
+    def prune(self):
+        """Drop address buckets that have refilled, a new bucket would be identical"""
+        now = time.monotonic()
+        for address, buckets in list(self.addresses.items()):
+            full = True
+            for key, bucket in buckets.items():
+                if key == "connect":
+                    burst, rate = RATE_LIMIT_CONNECTIONS
+                else:
+                    burst, rate = RATE_LIMITS.get(key, RATE_LIMIT_DEFAULT)
+                    burst, rate = burst * RATE_LIMIT_PER_ADDRESS, rate * RATE_LIMIT_PER_ADDRESS
+                bucket.refill(burst, rate, now)
+                if bucket.tokens < burst:
+                    full = False
+                    break
+            if full:
+                del self.addresses[address]
+
+
+_memory_reading: Tuple[float, Optional[float]] = (0.0, None)  # (time read, resident MB)
+
+
+def resident_memory_mb() -> Optional[float]:
+    """Resident memory of this process in MB, None where /proc isn't available"""
+    global _memory_reading
+    now = time.monotonic()
+    if now - _memory_reading[0] >= MEMORY_CHECK_INTERVAL:
+        try:
+            with open("/proc/self/statm") as f:
+                pages = int(f.read().split()[1])
+            _memory_reading = (now, pages * os.sysconf("SC_PAGE_SIZE") / 2 ** 20)
+        except (OSError, ValueError):
+            _memory_reading = (now, None)
+    return _memory_reading[1]
+
+
+def admission_error(command: str, tables: int) -> Optional[str]:
+    """Why a create: or join: must be refused right now, None to admit it"""
+    if command == "create" and MAX_TABLES is not None and tables >= MAX_TABLES:
+        return "Server is full, try again later"
+    if MAX_MEMORY_MB is not None:
+        memory = resident_memory_mb()
+        if memory is not None and memory >= MAX_MEMORY_MB:
+            return "Server is busy, try again later"
+    return None
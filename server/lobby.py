@@ -0,0 +1,90 @@
+import json
+import secrets
+from itertools import count
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from fastapi import Request, Response
+
+# ETags only hold within one server process, a restart must not produce 304s for stale copies
+SERVER_EPOCH = secrets.token_hex(4)
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Whether the request's If-None-Match covers etag"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    return any(tag.strip().removeprefix("W/") in (etag, "*") for tag in header.split(","))
+
+
+def cached_response(request: Request, etag: str, build: Callable[[], bytes]) -> Response:
+    """304 if the client already has this version, otherwise the body from build()"""
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(build(), media_type="application/json", headers=headers)
+
+
+class LobbyIndex:
+    """
+    Secondary index of games for the HTTP API.
+    Open lobbies (not dealt yet, with room to join) are kept in their own
+    dict that is updated when a game's seats change, so listing them never
+    scans every game. Responses are encoded once per version and served
+    with an ETag, so polling clients mostly get 304s.
+    """
+
+    def __init__(self, summary: Callable[[Any], Optional[Dict]], snapshot: Callable[[Any], Dict]):
+        self.summary = summary  # Lobby entry for a game, None if it isn't open
+        self.snapshot = snapshot  # Public view of a game
+        self.open: Dict[str, Dict] = {}  # game_id -> lobby entry, in creation order
+        self.version: int = 0  # Bumped whenever the open list changes
+        self.listing: Optional[Tuple[str, bytes]] = None  # (etag, body) of the open list
+        self.serials: Dict[str, int] = {}  # game_id -> serial, so a reused code gets new ETags
+        self.snapshots: Dict[str, Tuple[str, bytes]] = {}  # game_id -> (etag, body) of the last snapshot served
+        self.counter = count(1)
+
+    def update(self, game):
+        """Re-index a game after its seats or phase changed"""
+        if game.game_id not in self.serials:
+            self.serials[game.game_id] = next(self.counter)
+        entry = self.summary(game)
+        if entry == self.open.get(game.game_id):
+            return
+        if entry is None:
+            del self.open[game.game_id]
+        else:
+            self.open[game.game_id] = entry
+        self.version += 1
+
+    def remove(self, game_id: str):
+        """Forget a game that has been removed"""
+        self.serials.pop(game_id, None)
+        self.snapshots.pop(game_id, None)
+        if self.open.pop(game_id, None) is not None:
+            self.version += 1
+
+    def lobby_response(self, request: Request) -> Response:
+        etag = f'"{SERVER_EPOCH}-lobby-{self.version}"'
+
+        def build() -> bytes:
+            if self.listing is None or self.listing[0] != etag:
+                self.listing = (etag, json.dumps({"games": list(self.open.values())}).encode())
+            return self.listing[1]
+
+        return cached_response(request, etag, build)
+
+    def snapshot_response(self, request: Request, game) -> Response:
+        # Every command that changes a game publishes at least one public event,
+        # so the spectator sequence (plus the spectator count the snapshot shows) versions it
+        serial = self.serials.setdefault(game.game_id, next(self.counter))
+        etag = f'"{SERVER_EPOCH}-{serial}-{game.spectators.sequence}-{len(game.spectators)}"'
+
+        def build() -> bytes:
+            cached = self.snapshots.get(game.game_id)
+            if cached is None or cached[0] != etag:
+                cached = (etag, json.dumps(self.snapshot(game)).encode())
+                self.snapshots[game.game_id] = cached
+            return cached[1]
+
+        return cached_response(request, etag, build)
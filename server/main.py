@@ -1,31 +1,77 @@
 import time
 import random
 import json
+import hmac
 import asyncio
 import os
 from datetime import datetime
-from typing import Dict, List, Optional
-from string import ascii_letters
+from typing import Any, Dict, List, Optional, Set
 
-from fastapi import FastAPI, WebSocket
+from fastapi import FastAPI, HTTPException, Request, WebSocket
+
+from auction import Auction, call_display
+from bots import DIRECTIONS, SUITS, BotPlayer, shutdown_pool
+from game_codes import GAME_CODE_ADMIN_TOKEN, GameCodeAllocator
+from history import GameHistory, PlayLog, intern_suit
+from limits import RateLimiter, admission_error
+from lobby import LobbyIndex
+from spectators import SpectatorChannel, batch_frames
 
 app = FastAPI()
 
 # Configuration
+SUPPORTED_CAPABILITIES = ["batch"]  # Optional protocol features a client can opt into with "caps:"
 GAME_INACTIVITY_TIMEOUT = 3600  # 1 hour in seconds
 SAVE_GAME_HISTORY_TO_DISK = True  # Set to True to save game history to JSON files
 GAME_HISTORY_DIR = "game_history"  # Directory to save game histories
 
 
+class Seat:
+    """
+    A direction attribute of Game (game.north etc.) stored in game.seats.
+    Assigning it also keeps game.positions, the reverse lookup, in step.
+    """
+
+    __slots__ = ("index",)
+
+    def __init__(self, index: int):
+        self.index = index
+
+    def __get__(self, game, owner=None):
+        if game is None:
+            return self
+        return game.seats[self.index]
+
+    def __set__(self, game, websocket):
+        previous = game.seats[self.index]
+        if previous is not None and game.positions.get(previous) == self.index:
+            del game.positions[previous]
+        game.seats[self.index] = websocket
+        if websocket is not None:
+            game.positions[websocket] = self.index
+
+
 class Game:
-    def __init__(self):
+    __slots__ = (
+        "game_id", "last_updated", "players", "host", "seats", "positions",
+        "hands", "bidding_history", "current_player", "game_phase", "current_trick",
+        "tricks_won", "trick_number", "contract", "declarer", "dummy", "trump_suit",
+        "dummy_revealed", "game_number", "play_history", "game_history", "spectators",
+        "actor", "auction",
+    )
+
+    west = Seat(0)
+    north = Seat(1)
+    east = Seat(2)
+    south = Seat(3)
+
+    def __init__(self, game_id: str):
+        self.game_id: str = game_id
         self.last_updated: float = time.time()
         self.players: List[WebSocket] = []
         self.host: Optional[WebSocket] = None  # Track the host (first player)
-        self.north: Optional[WebSocket] = None
-        self.south: Optional[WebSocket] = None
-        self.east: Optional[WebSocket] = None
-        self.west: Optional[WebSocket] = None
+        self.seats: List[Optional[WebSocket]] = [None, None, None, None]  # Seat index -> connection
+        self.positions: Dict[WebSocket, int] = {}  # Connection -> seat index
         self.hands: Dict[str, List[int]] = {
             "north": [],
             "south": [],
@@ -33,21 +79,149 @@ class Game:
             "west": [],
         }
         self.bidding_history: List[Dict] = []
+        self.auction: Auction = Auction()  # Incremental auction state, validates each call
         self.current_player: int = 1  # Start with North (index 1)
         self.game_phase: str = "lobby"  # lobby, bidding, playing
         self.current_trick: List[Dict] = []  # Cards played in current trick
         self.tricks_won: List[int] = [0, 0, 0, 0]  # Tricks won by each player
+        self.trick_number: int = 0  # Tricks completed in the current deal
         self.contract: Optional[Dict] = None  # The final contract
+        self.declarer: Optional[int] = None  # Seat of the declarer, set with the contract
+        self.dummy: Optional[int] = None  # Seat of the dummy, set with the contract
         self.trump_suit: Optional[str] = None  # Trump suit for current deal
         self.dummy_revealed: bool = False  # Whether dummy's hand has been shared
         self.game_number: int = 1  # Track which game number we're on
         
         # Game history tracking
-        self.play_history: List[Dict] = []  # Track all plays in current game
-        self.game_history: List[Dict] = []  # Store completed games with full details
+        self.play_history: PlayLog = PlayLog()  # Track all plays in current game
+        self.game_history: GameHistory = GameHistory(game_id)  # Store completed games with full details
+        
+        # Spectators receive the public event stream only, never private hands
+        self.spectators = SpectatorChannel(get_spectator_snapshot, self)
+        
+        # The actor task that owns this game and serializes its commands
+        self.actor: Optional[GameActor] = None
+
+
+class GameActor:
+    """
+    Owns a Game and processes its commands one at a time from a mailbox.
+    Every connection at the table posts to the same mailbox, so command
+    handlers never interleave and need no locks. Handlers only queue their
+    outgoing messages; the actor flushes them once the command is done,
+    as a single batch frame for clients that support it.
+    """
+
+    __slots__ = ("game", "mailbox", "outbox", "task", "stopping")
+
+    def __init__(self, game: Game):
+        self.game = game
+        self.mailbox: asyncio.Queue = asyncio.Queue()
+        self.outbox: Dict[WebSocket, List[str]] = {}  # Encoded messages per recipient for the current command
+        self.stopping: bool = False
+        game.actor = self
+        self.task = asyncio.create_task(self.run())
+
+    def post(self, websocket: WebSocket, data: str) -> bool:
+        """Queue a command from a connection, returns False if the actor has stopped"""
+        if self.stopping or self.task.done():
+            return False
+        self.mailbox.put_nowait((websocket, data, None))
+        return True
+
+    async def call(self, websocket: WebSocket, data: str) -> Any:
+        """Queue a command and wait until it is processed, returns the handler's result (None if the actor stopped)"""
+        if self.stopping or self.task.done():
+            return None
+        reply = asyncio.get_running_loop().create_future()
+        self.mailbox.put_nowait((websocket, data, reply))
+        await asyncio.wait([reply, self.task], return_when=asyncio.FIRST_COMPLETED)
+        return reply.result() if reply.done() else None
+
+    def send(self, websocket: WebSocket, message: Dict):
+        """Queue a message for one connection"""
+        self.outbox.setdefault(websocket, []).append(json.dumps(message))
+
+    def broadcast(self, message: Dict):
+        """Queue a public event for every player and publish it to spectators"""
+        self.broadcast_frame(message["type"], json.dumps(message))
+
+    def broadcast_frame(self, event_type: str, text: str):
+        """broadcast() for an event that is already encoded"""
+        self.game.spectators.publish_frame(event_type, text)
+        for player in self.game.players:
+            self.outbox.setdefault(player, []).append(text)
+
+    async def flush(self):
+        """Send everything queued by the last command, each recipient in parallel"""
+        if not self.outbox:
+            return
+        outbox, self.outbox = self.outbox, {}
+        await asyncio.gather(*(self._deliver(websocket, frames) for websocket, frames in outbox.items()))
+
+    async def _deliver(self, websocket: WebSocket, frames: List[str]):
+        # Clients that opted in get every event from the command in one frame
+        if len(frames) > 1 and websocket in batching_clients:
+            frames = [batch_frames(frames)]
+        try:
+            for frame in frames:
+                await websocket.send_text(frame)
+        except:
+            pass  # Handle disconnected players
+
+    async def run(self):
+        while not self.stopping:
+            websocket, data, reply = await self.mailbox.get()
+            handler = COMMAND_HANDLERS.get(data.split(":", 1)[0])
+            result = None
+            if handler is not None:
+                try:
+                    result = handler(self, websocket, data)
+                except Exception as e:
+                    print(f"Error handling {data!r} in game {self.game.game_id}: {e}")
+                await self.flush()
+            if reply is not None and not reply.done():
+                reply.set_result(result)
+        
+        # The last player left and the game was removed
+        await remove_spectators(self.game)
+
+    async def stop(self):
+        """Stop processing commands, used when the game is removed from outside the actor"""
+        self.stopping = True
+        self.task.cancel()
+        try:
+            await self.task
+        except asyncio.CancelledError:
+            pass
 
 games: Dict[str, Game] = {}
 player_to_game: Dict[WebSocket, str] = {}
+spectator_to_game: Dict[WebSocket, str] = {}
+batching_clients: Set[WebSocket] = set()  # Connections that accept batch envelopes
+game_codes = GameCodeAllocator(reservations_path=f"{GAME_HISTORY_DIR}/reservations.json")
+rate_limiter = RateLimiter()
+
+
+# Shared vulnerability dicts so game records don't each hold their own copy (treat as read-only)
+VULNERABILITY = (
+    {'ns': False, 'ew': False},  # Game 1, 5, 9, etc.
+    {'ns': True, 'ew': False},  # Game 2, 6, 10, etc.
+    {'ns': False, 'ew': True},  # Game 3, 7, 11, etc.
+    {'ns': True, 'ew': True},  # Game 4, 8, 12, etc.
+)
+
+
+# Card plays and turns only take a few hundred distinct forms, so their frames are encoded once
+SUIT_VALUES = {suit: index for index, suit in enumerate(SUITS)}  # Suit name -> card number block
+CARD_PLAYED_FRAMES = [
+    [
+        json.dumps({"type": "card_played", "card": {"suit": SUITS[(card - 1) // 13], "rank": (card - 1) % 13}, "player": player})
+        for player in range(4)
+    ]
+    for card in range(53)  # Indexed by card number, 0 is unused
+]
+NEXT_PLAYER_FRAMES = [json.dumps({"type": "next_player", "current_player": player}) for player in range(4)]
 
 
 def get_vulnerability(game_number: int) -> Dict[str, bool]:
@@ -59,16 +233,7 @@ def get_vulnerability(game_number: int) -> Dict[str, bool]:
     3. E-W vulnerable (partnership 0)
     4. Both vulnerable
     """
-    position = (game_number - 1) % 4
-    
-    if position == 0:  # Game 1, 5, 9, etc.
-        return {'ns': False, 'ew': False}
-    elif position == 1:  # Game 2, 6, 10, etc.
-        return {'ns': True, 'ew': False}
-    elif position == 2:  # Game 3, 7, 11, etc.
-        return {'ns': False, 'ew': True}
-    else:  # Game 4, 8, 12, etc.
-        return {'ns': True, 'ew': True}
+    return VULNERABILITY[(game_number - 1) % 4]
 
 
 def check_bidding_end(history: List[Dict]) -> bool:
@@ -135,15 +300,7 @@ def get_final_contract(history: List[Dict]):
 
 def get_player_position(game: Game, websocket: WebSocket) -> Optional[int]:
     """Get the positional index (0=West, 1=North, 2=East, 3=South) for a websocket"""
-    if game.west == websocket:
-        return 0
-    elif game.north == websocket:
-        return 1
-    elif game.east == websocket:
-        return 2
-    elif game.south == websocket:
-        return 3
-    return None
+    return game.positions.get(websocket)
 
 
 def get_trick_winner(trick: List[Dict], trump_suit: Optional[str]) -> int:
@@ -358,15 +515,18 @@ def save_game_history_to_file(game_id: str, game_history: List[Dict]):
         return None
 
 
-async def broadcast_game_state(game: Game, game_id: str):
+def broadcast_game_state(game: Game):
     """Broadcast game state to all players in the game"""
     player_names = ["alpha", "beta", "sigma", "zeta"]
     
+    # Every seat change is announced here, keep the lobby listing in step
+    lobby.update(game)
+    
     for i, player in enumerate(game.players):
         # Create game state for this player
         game_state = {
             "type": "game_state",
-            "game_id": game_id,
+            "game_id": game.game_id,
             "last_updated": game.last_updated,
             "players": [player_names[j] for j in range(len(game.players))],
             "north": player_names[game.players.index(game.north)] if game.north else None,
@@ -377,11 +537,614 @@ async def broadcast_game_state(game: Game, game_id: str):
             "your_index": i,
             "is_host": player == game.host,
         }
-        
-        try:
-            await player.send_text(json.dumps(game_state))
-        except:
-            pass  # Handle disconnected players
+        game.actor.send(player, game_state)
+    
+    # Spectators get the same view without the per-player fields
+    game.spectators.publish({
+        "type": "game_state",
+        "game_id": game.game_id,
+        "last_updated": game.last_updated,
+        "players": [player_names[j] for j in range(len(game.players))],
+        "north": player_names[game.players.index(game.north)] if game.north else None,
+        "south": player_names[game.players.index(game.south)] if game.south else None,
+        "east": player_names[game.players.index(game.east)] if game.east else None,
+        "west": player_names[game.players.index(game.west)] if game.west else None,
+        "spectators": len(game.spectators),
+    })
+
+
+def get_spectator_snapshot(game: Game) -> Dict:
+    """Build the public view of a game for a spectator joining or resyncing mid-game"""
+    snapshot = {
+        "type": "spectator_snapshot",
+        "game_phase": game.game_phase,
+        "game_number": game.game_number,
+        "vulnerability": get_vulnerability(game.game_number),
+        "seats": {d: getattr(game, d) is not None for d in ["north", "south", "east", "west"]},
+        "spectators": len(game.spectators),
+        "current_player": game.current_player,
+        "bidding_history": game.bidding_history,
+        "contract": game.contract,
+        "current_trick": game.current_trick,
+        "tricks_won": game.tricks_won,
+        "dummy_player": None,
+        "dummy_hand": None,
+    }
+    
+    # Dummy's hand is public once revealed, every other hand stays private
+    if game.dummy_revealed and game.contract:
+        snapshot["dummy_player"] = game.dummy
+        snapshot["dummy_hand"] = game.hands[DIRECTIONS[game.dummy]]
+    
+    return snapshot
+
+
+def get_lobby_entry(game: Game) -> Optional[Dict]:
+    """The lobby listing entry for a game that hasn't been dealt and has room, None otherwise"""
+    if game.game_phase != "lobby" or len(game.players) >= 4:
+        return None
+    return {
+        "game_id": game.game_id,
+        "players": len(game.players),
+        "open_seats": [d for d in ["north", "south", "east", "west"] if getattr(game, d) is None],
+        "bots": sum(isinstance(player, BotPlayer) for player in game.players),
+    }
+
+
+def get_public_snapshot(game: Game) -> Dict:
+    """The spectator view of a game, served by GET /games/<game_id>"""
+    return dict(get_spectator_snapshot(game), type="game_snapshot", game_id=game.game_id)
+
+
+lobby = LobbyIndex(get_lobby_entry, get_public_snapshot)
+
+
+async def remove_spectators(game: Game):
+    """Detach all spectators from a game that is being removed"""
+    websockets = await game.spectators.close({"type": "spectate_ended", "message": "Game has ended"})
+    for websocket in websockets:
+        spectator_to_game.pop(websocket, None)
+
+
+def remove_bot(game: Game, bot: BotPlayer):
+    """Take a bot off its seat and out of the game"""
+    bot.stop()
+    game.players.remove(bot)
+    setattr(game, DIRECTIONS[bot.seat], None)
+    del player_to_game[bot]
+
+
+def handle_create(actor: "GameActor", websocket: WebSocket, data: str):
+    """Seat the creator of a new game as its host"""
+    game = actor.game
+    game.players.append(websocket)
+    game.host = websocket  # Set the creator as the host
+    player_to_game[websocket] = game.game_id
+    game.last_updated = time.time()
+    
+    # Send game code first
+    actor.send(websocket, {"type": "game_code", "code": game.game_id})
+    # Then broadcast game state
+    broadcast_game_state(game)
+
+
+def handle_join(actor: "GameActor", websocket: WebSocket, data: str) -> bool:
+    """Handle "join:<game_id>" once routed to the game, returns whether the player was added"""
+    game = actor.game
+    if len(game.players) >= 4:
+        actor.send(websocket, {"type": "error", "message": "Game is full"})
+        return False
+    game.players.append(websocket)
+    player_to_game[websocket] = game.game_id
+    game.last_updated = time.time()
+    
+    # Broadcast updated game state to ALL players
+    broadcast_game_state(game)
+    return True
+
+
+def handle_leave(actor: "GameActor", websocket: WebSocket, data: str):
+    """Remove a disconnected player, removing the game once it is empty"""
+    game = actor.game
+    if player_to_game.get(websocket) != game.game_id:
+        return
+    
+    # Remove player from game
+    if websocket in game.players:
+        game.players.remove(websocket)
+    
+    # Remove player from positions
+    for direction in ["north", "south", "east", "west"]:
+        if getattr(game, direction) == websocket:
+            setattr(game, direction, None)
+    
+    # Remove player from mapping
+    del player_to_game[websocket]
+    
+    # Bots don't keep a table open on their own
+    if all(isinstance(player, BotPlayer) for player in game.players):
+        for bot in list(game.players):
+            remove_bot(game, bot)
+    
+    # If game is empty, remove it
+    if len(game.players) == 0:
+        del games[game.game_id]
+        game_codes.release(game.game_id)
+        lobby.remove(game.game_id)
+        game.game_history.discard()
+        actor.stopping = True
+    else:
+        # Notify remaining players
+        broadcast_game_state(game)
+
+
+def handle_iam(actor: "GameActor", websocket: WebSocket, data: str):
+    """Handle "iam:<direction>" to take a seat"""
+    game = actor.game
+    if player_to_game.get(websocket) != game.game_id:
+        actor.send(websocket, {"type": "error", "message": "Not in a game"})
+        return
+    direction = data.split(":")[1]
+    if direction not in ["north", "south", "east", "west"]:
+        actor.send(websocket, {"type": "error", "message": "Invalid direction"})
+        return
+
+    # Set previous direction to None if occupied by this player
+    for d in ["north", "south", "east", "west"]:
+        if getattr(game, d) == websocket:
+            setattr(game, d, None)
+
+    # Taking a bot's seat sends the bot away
+    if isinstance(getattr(game, direction), BotPlayer):
+        remove_bot(game, getattr(game, direction))
+
+    # Assign new direction
+    setattr(game, direction, websocket)
+    game.last_updated = time.time()
+
+    # Broadcast updated game state to ALL players
+    broadcast_game_state(game)
+
+
+def handle_bot(actor: "GameActor", websocket: WebSocket, data: str):
+    """Handle "bot:<direction>" to seat a bot, host only"""
+    game = actor.game
+    if player_to_game.get(websocket) != game.game_id:
+        actor.send(websocket, {"type": "error", "message": "Not in a game"})
+        return
+    if websocket != game.host:
+        actor.send(websocket, {"type": "error", "message": "Only the host can add bots"})
+        return
+    direction = data.split(":")[1]
+    if direction not in ["north", "south", "east", "west"]:
+        actor.send(websocket, {"type": "error", "message": "Invalid direction"})
+        return
+    if getattr(game, direction) is not None:
+        actor.send(websocket, {"type": "error", "message": "Seat is taken"})
+        return
+    if len(game.players) >= 4:
+        actor.send(websocket, {"type": "error", "message": "Game is full"})
+        return
+
+    bot = BotPlayer(actor, DIRECTIONS.index(direction))
+    game.players.append(bot)
+    player_to_game[bot] = game.game_id
+    setattr(game, direction, bot)
+    game.last_updated = time.time()
+
+    broadcast_game_state(game)
+
+
+def handle_unbot(actor: "GameActor", websocket: WebSocket, data: str):
+    """Handle "unbot:<direction>" to remove a bot, host only"""
+    game = actor.game
+    if player_to_game.get(websocket) != game.game_id:
+        actor.send(websocket, {"type": "error", "message": "Not in a game"})
+        return
+    if websocket != game.host:
+        actor.send(websocket, {"type": "error", "message": "Only the host can remove bots"})
+        return
+    direction = data.split(":")[1]
+    bot = getattr(game, direction, None) if direction in ["north", "south", "east", "west"] else None
+    if not isinstance(bot, BotPlayer):
+        actor.send(websocket, {"type": "error", "message": "No bot in that seat"})
+        return
+
+    remove_bot(game, bot)
+    game.last_updated = time.time()
+
+    broadcast_game_state(game)
+
+
+def handle_start(actor: "GameActor", websocket: WebSocket, data: str):
+    """Handle "start:" to deal a new game"""
+    game = actor.game
+    if player_to_game.get(websocket) != game.game_id:
+        actor.send(websocket, {"type": "error", "message": "Not in a game"})
+        return
+
+    # Check if the requester is the host
+    if websocket != game.host:
+        actor.send(websocket, {"type": "error", "message": "Only the host can start the game"})
+        return
+
+    # Check if all positions are filled
+    if not all([game.north, game.south, game.east, game.west]):
+        actor.send(websocket, {"type": "error", "message": "All positions must be filled before starting"})
+        return
+
+    deck = list(range(1, 53))
+    random.shuffle(deck)
+
+    game.hands["north"] = sorted(deck[0:13])
+    game.hands["east"] = sorted(deck[13:26])
+    game.hands["south"] = sorted(deck[26:39])
+    game.hands["west"] = sorted(deck[39:52])
+
+    # Send hands to respective players
+    if game.north:
+        actor.send(game.north, {"type": "hand", "hand": game.hands["north"]})
+    if game.south:
+        actor.send(game.south, {"type": "hand", "hand": game.hands["south"]})
+    if game.east:
+        actor.send(game.east, {"type": "hand", "hand": game.hands["east"]})
+    if game.west:
+        actor.send(game.west, {"type": "hand", "hand": game.hands["west"]})
+
+    game.last_updated = time.time()
+    game.game_phase = "bidding"
+    lobby.update(game)
+
+    # Rotate dealer: Game 1 = North (1), Game 2 = East (2), Game 3 = South (3), Game 4 = West (0), then repeat
+    # Dealer rotates clockwise each game
+    dealer = (game.game_number - 1) % 4  # 0=West, 1=North, 2=East, 3=South
+    game.current_player = (dealer + 1) % 4  # Bidding starts with player to left of dealer
+
+    # Reset game state for new game
+    game.bidding_history = []
+    game.auction = Auction()
+    game.contract = None
+    game.declarer = None
+    game.dummy = None
+    game.trump_suit = None
+    game.dummy_revealed = False
+    game.current_trick = []
+    game.tricks_won = [0, 0, 0, 0]
+    game.trick_number = 0
+    game.play_history = PlayLog()  # Reset play history for new game
+
+    # Get vulnerability for current game
+    vulnerability = get_vulnerability(game.game_number)
+
+    # Broadcast game started to all players
+    actor.broadcast({
+        "type": "game_started", 
+        "message": "Game started and cards dealt!",
+        "current_player": game.current_player,
+        "game_number": game.game_number,
+        "vulnerability": vulnerability
+    })
+
+
+def handle_bid(actor: "GameActor", websocket: WebSocket, data: str):
+    """Handle "bid:level:suit:player:playerIndex:display" during the auction"""
+    game = actor.game
+    if player_to_game.get(websocket) != game.game_id:
+        actor.send(websocket, {"type": "error", "message": "Not in a game"})
+        return
+
+    if game.game_phase != "bidding":
+        actor.send(websocket, {"type": "error", "message": "Not in bidding phase"})
+        return
+
+    # Parse bid data: "bid:level:suit:player:playerIndex:display"
+    parts = data.split(":")
+    if len(parts) < 6 or not parts[1].isdigit() or not parts[4].isdigit():
+        actor.send(websocket, {"type": "error", "message": "Invalid bid format"})
+        return
+
+    level = int(parts[1])
+    suit = intern_suit(parts[2])
+    player_index = int(parts[4])
+
+    # Verify it's the player's turn
+    if player_index != game.current_player:
+        actor.send(websocket, {"type": "error", "message": "Not your turn"})
+        return
+
+    # Players can only bid from their own seat
+    if get_player_position(game, websocket) != player_index:
+        actor.send(websocket, {"type": "error", "message": "You can only bid for your own seat"})
+        return
+
+    # Verify the call is legal in the current auction
+    error = game.auction.validate(player_index, level, suit)
+    if error:
+        actor.send(websocket, {"type": "error", "message": error})
+        return
+
+    # Add bid to history; the name and display text the client sent are ignored
+    # since everyone sees them, they are rebuilt from the validated call
+    bid = {
+        "player": DIRECTIONS[player_index].capitalize(),
+        "playerIndex": player_index,
+        "level": level,
+        "suit": suit,
+        "display": call_display(level, suit)
+    }
+    game.bidding_history.append(bid)
+    game.auction.apply(player_index, level, suit)
+    game.last_updated = time.time()  # Update activity timestamp
+
+    # Broadcast bid to all players
+    actor.broadcast({
+        "type": "bid",
+        "bid": bid
+    })
+
+    # Check if bidding has ended
+    if game.auction.ended:
+        contract = game.auction.contract()
+
+        if contract:
+            game.game_phase = "playing"
+            game.contract = contract
+            game.declarer = contract['declarer']
+            game.dummy = (game.declarer + 2) % 4
+            # Set trump suit (None for NT)
+            game.trump_suit = None if contract['suit'] == 'NT' else contract['suit']
+            # Lead player is to the left of declarer
+            lead_player = (contract['declarer'] + 1) % 4
+            game.current_player = lead_player
+
+            # Broadcast bidding ended and start playing
+            actor.broadcast({
+                "type": "bidding_ended",
+                "contract": contract,
+                "current_player": lead_player
+            })
+        else:
+            # All passed out - end game with 0 scores
+            vulnerability = get_vulnerability(game.game_number)
+
+            # Create zero score data
+            zero_score_data = {
+                'declarer_partnership': 0,  # Arbitrary since no contract
+                'declarer_score': {
+                    'contract_points': 0,
+                    'overtrick_points': 0,
+                    'slam_bonus': 0,
+                    'double_bonus': 0,
+                    'game_bonus': 0,
+                    'undertrick_penalty': 0,
+                    'total': 0
+                },
+                'defender_score': {
+                    'contract_points': 0,
+                    'overtrick_points': 0,
+                    'slam_bonus': 0,
+                    'double_bonus': 0,
+                    'game_bonus': 0,
+                    'undertrick_penalty': 0,
+                    'total': 0
+                },
+                'contract_made': False,
+                'tricks_taken': 0,
+                'tricks_needed': 0
+            }
+
+            # Save game record with all passes
+            # (histories are replaced, not cleared, when the next game starts so no copy is needed)
+            game_record = {
+                "game_number": game.game_number,
+                "timestamp": time.time(),
+                "vulnerability": vulnerability,
+                "bidding_history": game.bidding_history,
+                "contract": None,  # No contract was made
+                "play_history": game.play_history,  # No cards were played
+                "tricks_won": [0, 0, 0, 0],
+                "score": zero_score_data,
+                "declarer": None,
+                "dummy": None,
+                "passed_out": True
+            }
+            game.game_history.append(game_record)
+
+            print(f"Game {game.game_number} passed out (all players passed)")
+
+            # Broadcast game over with zero scores
+            actor.broadcast({
+                "type": "game_over",
+                "tricks": [0, 0, 0, 0],
+                "contract": None,
+                "score": zero_score_data,
+                "game_number": game.game_number,
+                "vulnerability": vulnerability,
+                "passed_out": True
+            })
+
+            # Increment game number for next game
+            game.game_number += 1
+    else:
+        # Move to next player
+        game.current_player = (game.current_player + 1) % 4
+        actor.broadcast({
+            "type": "next_player",
+            "current_player": game.current_player
+        })
+
+
+def handle_play(actor: "GameActor", websocket: WebSocket, data: str):
+    """Handle "play:suit:rank:player_index" during the play"""
+    game = actor.game
+    if player_to_game.get(websocket) != game.game_id:
+        actor.send(websocket, {"type": "error", "message": "Not in a game"})
+        return
+
+    if game.game_phase != "playing":
+        actor.send(websocket, {"type": "error", "message": "Not in playing phase"})
+        return
+
+    # Parse play data: "play:suit:rank:player_index"
+    parts = data.split(":")
+    if len(parts) < 4:
+        actor.send(websocket, {"type": "error", "message": "Invalid play format"})
+        return
+
+    suit = intern_suit(parts[1])
+    rank = int(parts[2])
+    player_index = int(parts[3])
+
+    # Verify it's the player's turn
+    if player_index != game.current_player:
+        actor.send(websocket, {"type": "error", "message": "Not your turn"})
+        return
+
+    # Validate who can play this card
+    player_position = game.positions.get(websocket)
+    if player_position is None:
+        actor.send(websocket, {"type": "error", "message": "Player position not found"})
+        return
+
+    dummy = game.dummy
+    if dummy is not None and player_index == dummy:
+        # Only declarer can play dummy's cards
+        if player_position != game.declarer:
+            actor.send(websocket, {"type": "error", "message": "Only declarer can play dummy's cards"})
+            return
+    else:
+        # Players can only play their own cards
+        if player_position != player_index:
+            actor.send(websocket, {"type": "error", "message": "You can only play your own cards"})
+            return
+
+    # Find the card number (1-52) based on suit and rank
+    if suit not in SUIT_VALUES or not 0 <= rank <= 12:
+        actor.send(websocket, {"type": "error", "message": "Invalid card"})
+        return
+    card_number = SUIT_VALUES[suit] * 13 + rank + 1
+
+    # Track play in game history first, nothing else has changed if recording it fails
+    game.play_history.append(card_number, player_index)
+
+    # Remove card from player's hand
+    hand = game.hands[DIRECTIONS[player_index]]
+    if card_number in hand:
+        hand.remove(card_number)
+
+    # Add card to current trick
+    played_card = {
+        "suit": suit,
+        "rank": rank,
+        "player": player_index
+    }
+    game.current_trick.append(played_card)
+    game.last_updated = time.time()  # Update activity timestamp
+
+    # Broadcast card played to all players
+    actor.broadcast_frame("card_played", CARD_PLAYED_FRAMES[card_number][player_index])
+
+    # After first card is played, reveal dummy's hand to all players
+    if not game.dummy_revealed and len(game.current_trick) == 1:
+        game.dummy_revealed = True
+
+        # Broadcast dummy's hand to all players
+        actor.broadcast({
+            "type": "dummy_revealed",
+            "dummy_player": dummy,
+            "dummy_hand": game.hands[DIRECTIONS[dummy]]
+        })
+
+    # If dummy's card was played, update everyone with the new dummy hand
+    if player_index == dummy:
+        actor.broadcast({
+            "type": "dummy_hand_updated",
+            "dummy_player": dummy,
+            "dummy_hand": hand
+        })
+
+    # Check if trick is complete (4 cards played)
+    if len(game.current_trick) == 4:
+        # Determine winner
+        winner = get_trick_winner(game.current_trick, game.trump_suit)
+        game.tricks_won[winner] += 1
+        game.trick_number += 1
+
+        # Broadcast trick complete
+        actor.broadcast({
+            "type": "trick_complete",
+            "winner": winner,
+            "tricks": game.tricks_won
+        })
+
+        # Reset current trick and set next player to winner
+        game.current_trick = []
+        game.current_player = winner
+
+        # Check if all 13 tricks are complete
+        if game.trick_number == 13:
+            # Get vulnerability for current game number
+            vulnerability = get_vulnerability(game.game_number)
+
+            # Calculate score
+            score_data = calculate_score(game.contract, game.tricks_won, vulnerability)
+
+            # Save complete game history before incrementing game number
+            # (histories are replaced, not cleared, when the next game starts so no copy is needed)
+            game_record = {
+                "game_number": game.game_number,
+                "timestamp": time.time(),
+                "vulnerability": vulnerability,
+                "bidding_history": game.bidding_history,
+                "contract": game.contract.copy() if game.contract else None,
+                "play_history": game.play_history,
+                "tricks_won": game.tricks_won.copy(),
+                "score": score_data,
+                "declarer": game.declarer,
+                "dummy": game.dummy
+            }
+            game.game_history.append(game_record)
+
+            # Log the saved game
+            print(f"Game {game.game_number} completed and saved to history. Total games: {len(game.game_history)}")
+            print(f"  - Bidding history: {len(game.bidding_history)} bids")
+            print(f"  - Play history: {len(game.play_history)} plays")
+            print(f"  - Contract: {game.contract}")
+            print(f"  - Score: Declarer {score_data['declarer_score']['total']}, Defender {score_data['defender_score']['total']}")
+
+            # Game over - broadcast final results with score
+            actor.broadcast({
+                "type": "game_over",
+                "tricks": game.tricks_won,
+                "contract": game.contract,
+                "score": score_data,
+                "game_number": game.game_number,
+                "vulnerability": vulnerability
+            })
+
+            # Increment game number for next game
+            game.game_number += 1
+        else:
+            # Continue to next trick
+            actor.broadcast_frame("next_player", NEXT_PLAYER_FRAMES[game.current_player])
+    else:
+        # Move to next player
+        game.current_player = (game.current_player + 1) % 4
+        actor.broadcast_frame("next_player", NEXT_PLAYER_FRAMES[game.current_player])
+
+
+# Commands a game actor processes, keyed by the prefix before the first ":"
+COMMAND_HANDLERS = {
+    "create": handle_create,
+    "join": handle_join,
+    "iam": handle_iam,
+    "start": handle_start,
+    "bid": handle_bid,
+    "play": handle_play,
+    "bot": handle_bot,
+    "unbot": handle_unbot,
+    "leave": handle_leave,
+}
 
 
 async def cleanup_inactive_games():
@@ -389,6 +1152,8 @@ async def cleanup_inactive_games():
     while True:
         try:
             await asyncio.sleep(300)  # Check every 5 minutes
+            rate_limiter.prune()
+            game_codes.expire_reservations()
             
             current_time = time.time()
             games_to_remove = []
@@ -398,30 +1163,41 @@ async def cleanup_inactive_games():
                 
                 if time_since_update > GAME_INACTIVITY_TIMEOUT:
                     games_to_remove.append(game_id)
-                    
-                    # Log the cleanup with game history summary
-                    print(f"Cleaning up inactive game {game_id}")
-                    print(f"  - Inactive for: {time_since_update / 60:.1f} minutes")
-                    print(f"  - Total games played: {len(game.game_history)}")
-                    print(f"  - Current game number: {game.game_number}")
-                    print(f"  - Game phase: {game.game_phase}")
-                    
-                    # Save game history to file before cleanup
-                    if len(game.game_history) > 0:
-                        print(f"  - Game history preserved with {len(game.game_history)} completed games")
-                        save_game_history_to_file(game_id, game.game_history)
             
             # Remove inactive games
             for game_id in games_to_remove:
-                game = games[game_id]
+                game = games.get(game_id)
+                if game is None:
+                    continue  # Removed by its actor while we were cleaning up others
+                
+                # Stop the actor first so nothing else touches the game
+                await game.actor.stop()
+                
+                # Log the cleanup with game history summary
+                print(f"Cleaning up inactive game {game_id}")
+                print(f"  - Inactive for: {(current_time - game.last_updated) / 60:.1f} minutes")
+                print(f"  - Total games played: {len(game.game_history)}")
+                print(f"  - Current game number: {game.game_number}")
+                print(f"  - Game phase: {game.game_phase}")
+                
+                # Save game history to file before cleanup
+                if len(game.game_history) > 0:
+                    print(f"  - Game history preserved with {len(game.game_history)} completed games")
+                    save_game_history_to_file(game_id, game.game_history.to_list())
+                game.game_history.discard()
                 
                 # Clean up player mappings
                 for player in game.players:
+                    if isinstance(player, BotPlayer):
+                        player.stop()
                     if player in player_to_game:
                         del player_to_game[player]
                 
                 # Remove game
                 del games[game_id]
+                game_codes.release(game_id)
+                lobby.remove(game_id)
+                await remove_spectators(game)
                 print(f"✓ Game {game_id} removed from memory")
             
             if games_to_remove:
@@ -445,9 +1221,75 @@ async def startup_event():
     print(f"Games will be removed after {GAME_INACTIVITY_TIMEOUT / 60:.0f} minutes of inactivity")
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the bot worker processes"""
+    shutdown_pool()
+
+
+@app.get("/lobby")
+async def list_lobby(request: Request):
+    """Games that haven't been dealt yet and still have room to join"""
+    return lobby.lobby_response(request)
+
+
+@app.get("/games/{game_id}")
+async def get_game(game_id: str, request: Request):
+    """Public snapshot of a game, the same view spectators get"""
+    game = games.get(game_id)
+    if game is None:
+        raise HTTPException(status_code=404, detail="Game not found")
+    return lobby.snapshot_response(request, game)
+
+
+def require_admin(request: Request):
+    """Reject requests without the admin bearer token, the endpoints don't exist when no token is configured"""
+    if not GAME_CODE_ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    authorization = request.headers.get("authorization", "")
+    if not hmac.compare_digest(authorization.encode(), f"Bearer {GAME_CODE_ADMIN_TOKEN}".encode()):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+
+@app.post("/reservations")
+async def create_reservation(request: Request):
+    """Reserve a game code for a scheduled game, body {"code": optional, "ttl": optional seconds}"""
+    require_admin(request)
+    try:
+        body = await request.json() if await request.body() else {}
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid JSON")
+    if not isinstance(body, dict):
+        raise HTTPException(status_code=400, detail="Expected a JSON object")
+
+    try:
+        code, token, expires = game_codes.reserve(body.get("code"), body.get("ttl"))
+    except (TypeError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=str(e) if isinstance(e, ValueError) else "Invalid reservation")
+    return {"code": code, "token": token, "expires_at": expires}
+
+
+@app.delete("/reservations/{code}")
+async def delete_reservation(code: str, request: Request):
+    """Cancel a reservation that won't be used"""
+    require_admin(request)
+    if code not in game_codes.reserved:
+        raise HTTPException(status_code=404, detail="Reservation not found")
+    game_codes.cancel_reservation(code)
+    return {"code": code}
+
+
 @app.websocket("/ws/")
 async def websocket_endpoint(websocket: WebSocket):
+    address = websocket.client.host if websocket.client else "unknown"
+    if not rate_limiter.allow_connection(address):
+        # Refused before the handshake completes, the client gets HTTP 403
+        await websocket.close(code=1008)
+        return
     await websocket.accept()
+    # The actor of the game this connection last created or successfully joined; commands are
+    # routed to its mailbox in the order they arrive
+    actor: Optional[GameActor] = None
     try:
         while True:
             try:
@@ -456,468 +1298,112 @@ async def websocket_endpoint(websocket: WebSocket):
                 # WebSocket disconnected
                 print(f"WebSocket disconnected: {e}")
                 break
+            
+            command = data.split(":", 1)[0]
+            if not rate_limiter.allow(websocket, address, command):
+                if rate_limiter.should_disconnect(websocket):
+                    print(f"Closing connection from {address}: too many rejected messages")
+                    await websocket.close(code=1008)
+                    break
+                try:
+                    await websocket.send_text(json.dumps({"type": "error", "message": "Too many requests"}))
+                except Exception:
+                    break  # A flooding client often closes before its rejections arrive
+                continue
+                
+            if websocket in spectator_to_game and data.startswith(("create:", "join:")):
+                await websocket.send_text(json.dumps({"type": "error", "message": "Stop spectating before joining a game"}))
+                continue
+            
+            if data.startswith(("create:", "join:")):
+                # Shed new tables and players before the server runs out of room
+                error = admission_error(command, len(games))
+                if error:
+                    try:
+                        await websocket.send_text(json.dumps({"type": "error", "message": error}))
+                    except Exception:
+                        break
+                    continue
                 
             if data.startswith("create:"):
-                game_id = ''.join(random.choices('0123456789'+ascii_letters, k=6))
-                game = Game()
-                game.players.append(websocket)
-                game.host = websocket  # Set the creator as the host
+                # "create:" gets a fresh code, "create:<code>:<token>" claims a reserved one
+                parts = data.split(":")
+                if len(parts) >= 3 and parts[1]:
+                    game_id = parts[1]
+                    if not game_codes.claim(game_id, parts[2]):
+                        await websocket.send_text(json.dumps({"type": "error", "message": "Invalid reservation"}))
+                        continue
+                else:
+                    game_id = game_codes.allocate()
+                game = Game(game_id)
                 games[game_id] = game
-                player_to_game[websocket] = game_id
-                game.last_updated = time.time()
-                
-                # Send game code first
-                await websocket.send_text(json.dumps({"type": "game_code", "code": game_id}))
-                # Then broadcast game state
-                await broadcast_game_state(game, game_id)
+                actor = GameActor(game)
+                actor.post(websocket, data)
             elif data.startswith("join:"):
                 game_id = data.split(":")[1]
                 if game_id not in games:
                     await websocket.send_text(json.dumps({"type": "error", "message": "Game not found"}))
                     continue
-                game = games[game_id]
-                if len(game.players) >= 4:
-                    await websocket.send_text(json.dumps({"type": "error", "message": "Game is full"}))
-                    continue
-                game.players.append(websocket)
-                player_to_game[websocket] = game_id
-                game.last_updated = time.time()
-                
-                # Broadcast updated game state to ALL players
-                await broadcast_game_state(game, game_id)
-            elif data.startswith("iam:"):
-                if websocket not in player_to_game:
-                    await websocket.send_text(json.dumps({"type": "error", "message": "Not in a game"}))
-                    continue
-                game_id = player_to_game[websocket]
-                game = games[game_id]
-                direction = data.split(":")[1]
-                if direction not in ["north", "south", "east", "west"]:
-                    await websocket.send_text(json.dumps({"type": "error", "message": "Invalid direction"}))
-                    continue
-
-                # Set previous direction to None if occupied by this player
-                for d in ["north", "south", "east", "west"]:
-                    if getattr(game, d) == websocket:
-                        setattr(game, d, None)
-
-                # Assign new direction
-                setattr(game, direction, websocket)
-                game.last_updated = time.time()
-                
-                # Broadcast updated game state to ALL players
-                await broadcast_game_state(game, game_id)
-            elif data.startswith("start:"):
-                if websocket not in player_to_game:
-                    await websocket.send_text(json.dumps({"type": "error", "message": "Not in a game"}))
-                    continue
-                game_id = player_to_game[websocket]
-                game = games[game_id]
-
-                # Check if the requester is the host
-                if websocket != game.host:
-                    await websocket.send_text(json.dumps({"type": "error", "message": "Only the host can start the game"}))
+                # Commands keep going to the current game unless the join succeeds
+                target = games[game_id].actor
+                if await target.call(websocket, data):
+                    actor = target
+            elif data.startswith("watch:"):
+                game_id = data.split(":")[1]
+                if websocket in player_to_game:
+                    await websocket.send_text(json.dumps({"type": "error", "message": "Players cannot spectate"}))
                     continue
-
-                # Check if all positions are filled
-                if not all([game.north, game.south, game.east, game.west]):
-                    await websocket.send_text(json.dumps({"type": "error", "message": "All positions must be filled before starting"}))
+                if game_id not in games:
+                    await websocket.send_text(json.dumps({"type": "error", "message": "Game not found"}))
                     continue
-
-                deck = list(range(1, 53))
-                random.shuffle(deck)
-
-                game.hands["north"] = sorted(deck[0:13])
-                game.hands["east"] = sorted(deck[13:26])
-                game.hands["south"] = sorted(deck[26:39])
-                game.hands["west"] = sorted(deck[39:52])
-
-                # Send hands to respective players
-                if game.north:
-                    await game.north.send_text(json.dumps({"type": "hand", "hand": game.hands["north"]}))
-                if game.south:
-                    await game.south.send_text(json.dumps({"type": "hand", "hand": game.hands["south"]}))
-                if game.east:
-                    await game.east.send_text(json.dumps({"type": "hand", "hand": game.hands["east"]}))
-                if game.west:
-                    await game.west.send_text(json.dumps({"type": "hand", "hand": game.hands["west"]}))
-
-                game.last_updated = time.time()
-                game.game_phase = "bidding"
-                
-                # Rotate dealer: Game 1 = North (1), Game 2 = East (2), Game 3 = South (3), Game 4 = West (0), then repeat
-                # Dealer rotates clockwise each game
-                dealer = (game.game_number - 1) % 4  # 0=West, 1=North, 2=East, 3=South
-                game.current_player = (dealer + 1) % 4  # Bidding starts with player to left of dealer
-                
-                # Reset game state for new game
-                game.bidding_history = []
-                game.contract = None
-                game.trump_suit = None
-                game.dummy_revealed = False
-                game.current_trick = []
-                game.tricks_won = [0, 0, 0, 0]
-                game.play_history = []  # Reset play history for new game
                 
-                # Get vulnerability for current game
-                vulnerability = get_vulnerability(game.game_number)
-                
-                # Broadcast game started to all players
-                for player in game.players:
-                    await player.send_text(json.dumps({
-                        "type": "game_started", 
-                        "message": "Game started and cards dealt!",
-                        "current_player": game.current_player,
-                        "game_number": game.game_number,
-                        "vulnerability": vulnerability
-                    }))
-            elif data.startswith("bid:"):
-                if websocket not in player_to_game:
-                    await websocket.send_text(json.dumps({"type": "error", "message": "Not in a game"}))
-                    continue
-                game_id = player_to_game[websocket]
+                # A full table leaves the current subscription as it is
                 game = games[game_id]
-                
-                # Parse bid data: "bid:level:suit:player:playerIndex:display"
-                parts = data.split(":")
-                if len(parts) < 6:
-                    await websocket.send_text(json.dumps({"type": "error", "message": "Invalid bid format"}))
-                    continue
-                
-                level = int(parts[1])
-                suit = parts[2]
-                player = parts[3]
-                player_index = int(parts[4])
-                display = parts[5]
-                
-                # Verify it's the player's turn
-                if player_index != game.current_player:
-                    await websocket.send_text(json.dumps({"type": "error", "message": "Not your turn"}))
+                if not game.spectators.has_room(websocket):
+                    await websocket.send_text(json.dumps({"type": "error", "message": "Too many spectators"}))
                     continue
                 
-                # Add bid to history
-                bid = {
-                    "player": player,
-                    "playerIndex": player_index,
-                    "level": level,
-                    "suit": suit,
-                    "display": display
-                }
-                game.bidding_history.append(bid)
-                game.last_updated = time.time()  # Update activity timestamp
-                
-                # Broadcast bid to all players
-                for player_ws in game.players:
-                    await player_ws.send_text(json.dumps({
-                        "type": "bid",
-                        "bid": bid
-                    }))
+                # Switching tables drops the previous subscription
+                if websocket in spectator_to_game:
+                    previous_id = spectator_to_game.pop(websocket)
+                    if previous_id in games:
+                        games[previous_id].spectators.unsubscribe(websocket)
                 
-                # Check if bidding has ended
-                if check_bidding_end(game.bidding_history):
-                    contract = get_final_contract(game.bidding_history)
-                    
-                    if contract:
-                        game.game_phase = "playing"
-                        game.contract = contract
-                        # Set trump suit (None for NT)
-                        game.trump_suit = None if contract['suit'] == 'NT' else contract['suit']
-                        # Lead player is to the left of declarer
-                        lead_player = (contract['declarer'] + 1) % 4
-                        game.current_player = lead_player
-                        
-                        # Broadcast bidding ended and start playing
-                        for player_ws in game.players:
-                            await player_ws.send_text(json.dumps({
-                                "type": "bidding_ended",
-                                "contract": contract,
-                                "current_player": lead_player
-                            }))
-                    else:
-                        # All passed out - end game with 0 scores
-                        vulnerability = get_vulnerability(game.game_number)
-                        
-                        # Create zero score data
-                        zero_score_data = {
-                            'declarer_partnership': 0,  # Arbitrary since no contract
-                            'declarer_score': {
-                                'contract_points': 0,
-                                'overtrick_points': 0,
-                                'slam_bonus': 0,
-                                'double_bonus': 0,
-                                'game_bonus': 0,
-                                'undertrick_penalty': 0,
-                                'total': 0
-                            },
-                            'defender_score': {
-                                'contract_points': 0,
-                                'overtrick_points': 0,
-                                'slam_bonus': 0,
-                                'double_bonus': 0,
-                                'game_bonus': 0,
-                                'undertrick_penalty': 0,
-                                'total': 0
-                            },
-                            'contract_made': False,
-                            'tricks_taken': 0,
-                            'tricks_needed': 0
-                        }
-                        
-                        # Save game record with all passes
-                        game_record = {
-                            "game_number": game.game_number,
-                            "timestamp": time.time(),
-                            "vulnerability": vulnerability,
-                            "bidding_history": game.bidding_history.copy(),
-                            "contract": None,  # No contract was made
-                            "play_history": [],  # No cards were played
-                            "tricks_won": [0, 0, 0, 0],
-                            "score": zero_score_data,
-                            "declarer": None,
-                            "dummy": None,
-                            "passed_out": True
-                        }
-                        game.game_history.append(game_record)
-                        
-                        print(f"Game {game.game_number} passed out (all players passed)")
-                        
-                        # Broadcast game over with zero scores
-                        for player_ws in game.players:
-                            await player_ws.send_text(json.dumps({
-                                "type": "game_over",
-                                "tricks": [0, 0, 0, 0],
-                                "contract": None,
-                                "score": zero_score_data,
-                                "game_number": game.game_number,
-                                "vulnerability": vulnerability,
-                                "passed_out": True
-                            }))
-                        
-                        # Increment game number for next game
-                        game.game_number += 1
+                # The spectator's sender delivers "watching" ahead of its first snapshot
+                game.spectators.subscribe(websocket, websocket in batching_clients, {"type": "watching", "game_id": game_id})
+                spectator_to_game[websocket] = game_id
+            elif data.startswith("caps:"):
+                # "caps:batch" opts into batch envelopes, unknown capabilities are ignored
+                requested = data.split(":", 1)[1].split(",")
+                enabled = [c for c in SUPPORTED_CAPABILITIES if c in requested]
+                if "batch" in enabled:
+                    batching_clients.add(websocket)
                 else:
-                    # Move to next player
-                    game.current_player = (game.current_player + 1) % 4
-                    for player_ws in game.players:
-                        await player_ws.send_text(json.dumps({
-                            "type": "next_player",
-                            "current_player": game.current_player
-                        }))
-            elif data.startswith("play:"):
-                if websocket not in player_to_game:
-                    await websocket.send_text(json.dumps({"type": "error", "message": "Not in a game"}))
-                    continue
-                game_id = player_to_game[websocket]
-                game = games[game_id]
-                
-                if game.game_phase != "playing":
-                    await websocket.send_text(json.dumps({"type": "error", "message": "Not in playing phase"}))
-                    continue
-                
-                # Parse play data: "play:suit:rank:player_index"
-                parts = data.split(":")
-                if len(parts) < 4:
-                    await websocket.send_text(json.dumps({"type": "error", "message": "Invalid play format"}))
+                    batching_clients.discard(websocket)
+                await websocket.send_text(json.dumps({"type": "caps", "caps": enabled}))
+            elif data.startswith("unwatch:"):
+                if websocket not in spectator_to_game:
+                    await websocket.send_text(json.dumps({"type": "error", "message": "Not spectating"}))
                     continue
-                
-                suit = parts[1]
-                rank = int(parts[2])
-                player_index = int(parts[3])
-                
-                # Verify it's the player's turn
-                if player_index != game.current_player:
-                    await websocket.send_text(json.dumps({"type": "error", "message": "Not your turn"}))
-                    continue
-                
-                # Get dummy (partner of declarer)
-                dummy = None
-                if game.contract:
-                    dummy = (game.contract['declarer'] + 2) % 4
-                
-                # Validate who can play this card
-                player_position = get_player_position(game, websocket)
-                if player_position is None:
-                    await websocket.send_text(json.dumps({"type": "error", "message": "Player position not found"}))
+                game_id = spectator_to_game.pop(websocket)
+                if game_id in games:
+                    games[game_id].spectators.unsubscribe(websocket)
+            else:
+                # Game commands go to the actor, unknown commands are ignored
+                if command not in COMMAND_HANDLERS or command in ["create", "join", "leave"]:
                     continue
-                
-                if dummy is not None and player_index == dummy:
-                    # Only declarer can play dummy's cards
-                    if player_position != game.contract['declarer']:
-                        await websocket.send_text(json.dumps({"type": "error", "message": "Only declarer can play dummy's cards"}))
-                        continue
-                else:
-                    # Players can only play their own cards
-                    if player_position != player_index:
-                        await websocket.send_text(json.dumps({"type": "error", "message": "You can only play your own cards"}))
-                        continue
-                
-                # Remove card from player's hand
-                direction_names = ["west", "north", "east", "south"]
-                player_direction = direction_names[player_index]
-                card_number = None
-                
-                # Find the card number (1-52) based on suit and rank
-                suit_values = {"spades": 0, "hearts": 1, "diamonds": 2, "clubs": 3}
-                card_number = suit_values[suit] * 13 + rank + 1
-                
-                if card_number in game.hands[player_direction]:
-                    game.hands[player_direction].remove(card_number)
-                
-                # Add card to current trick
-                played_card = {
-                    "suit": suit,
-                    "rank": rank,
-                    "player": player_index
-                }
-                game.current_trick.append(played_card)
-                game.last_updated = time.time()  # Update activity timestamp
-                
-                # Track play in game history
-                game.play_history.append({
-                    "trick_number": sum(game.tricks_won) + 1,
-                    "card_in_trick": len(game.current_trick),
-                    "suit": suit,
-                    "rank": rank,
-                    "player": player_index,
-                    "timestamp": time.time()
-                })
-                
-                # Broadcast card played to all players
-                for player_ws in game.players:
-                    await player_ws.send_text(json.dumps({
-                        "type": "card_played",
-                        "card": {"suit": suit, "rank": rank},
-                        "player": player_index
-                    }))
-                
-                # After first card is played, reveal dummy's hand to all players
-                if not game.dummy_revealed and len(game.current_trick) == 1:
-                    game.dummy_revealed = True
-                    dummy = (game.contract['declarer'] + 2) % 4
-                    direction_names = ["west", "north", "east", "south"]
-                    dummy_direction = direction_names[dummy]
-                    dummy_hand = game.hands[dummy_direction]
-                    
-                    # Broadcast dummy's hand to all players
-                    for player_ws in game.players:
-                        await player_ws.send_text(json.dumps({
-                            "type": "dummy_revealed",
-                            "dummy_player": dummy,
-                            "dummy_hand": dummy_hand
-                        }))
-                
-                # If dummy's card was played, update everyone with the new dummy hand
-                if game.contract and player_index == (game.contract['declarer'] + 2) % 4:
-                    dummy_pos = (game.contract['declarer'] + 2) % 4
-                    updated_dummy_hand = game.hands[direction_names[dummy_pos]]
-                    for player_ws in game.players:
-                        await player_ws.send_text(json.dumps({
-                            "type": "dummy_hand_updated",
-                            "dummy_player": dummy_pos,
-                            "dummy_hand": updated_dummy_hand
-                        }))
-                
-                # Check if trick is complete (4 cards played)
-                if len(game.current_trick) == 4:
-                    # Determine winner
-                    winner = get_trick_winner(game.current_trick, game.trump_suit)
-                    game.tricks_won[winner] += 1
-                    
-                    # Broadcast trick complete
-                    for player_ws in game.players:
-                        await player_ws.send_text(json.dumps({
-                            "type": "trick_complete",
-                            "winner": winner,
-                            "tricks": game.tricks_won
-                        }))
-                    
-                    # Reset current trick and set next player to winner
-                    game.current_trick = []
-                    game.current_player = winner
-                    
-                    # Check if all 13 tricks are complete
-                    if sum(game.tricks_won) == 13:
-                        # Get vulnerability for current game number
-                        vulnerability = get_vulnerability(game.game_number)
-                        
-                        # Calculate score
-                        score_data = calculate_score(game.contract, game.tricks_won, vulnerability)
-                        
-                        # Save complete game history before incrementing game number
-                        game_record = {
-                            "game_number": game.game_number,
-                            "timestamp": time.time(),
-                            "vulnerability": vulnerability,
-                            "bidding_history": game.bidding_history.copy(),
-                            "contract": game.contract.copy() if game.contract else None,
-                            "play_history": game.play_history.copy(),
-                            "tricks_won": game.tricks_won.copy(),
-                            "score": score_data,
-                            "declarer": game.contract['declarer'] if game.contract else None,
-                            "dummy": (game.contract['declarer'] + 2) % 4 if game.contract else None
-                        }
-                        game.game_history.append(game_record)
-                        
-                        # Log the saved game
-                        print(f"Game {game.game_number} completed and saved to history. Total games: {len(game.game_history)}")
-                        print(f"  - Bidding history: {len(game.bidding_history)} bids")
-                        print(f"  - Play history: {len(game.play_history)} plays")
-                        print(f"  - Contract: {game.contract}")
-                        print(f"  - Score: Declarer {score_data['declarer_score']['total']}, Defender {score_data['defender_score']['total']}")
-                        
-                        # Game over - broadcast final results with score
-                        for player_ws in game.players:
-                            await player_ws.send_text(json.dumps({
-                                "type": "game_over",
-                                "tricks": game.tricks_won,
-                                "contract": game.contract,
-                                "score": score_data,
-                                "game_number": game.game_number,
-                                "vulnerability": vulnerability
-                            }))
-                        
-                        # Increment game number for next game
-                        game.game_number += 1
-                    else:
-                        # Continue to next trick
-                        for player_ws in game.players:
-                            await player_ws.send_text(json.dumps({
-                                "type": "next_player",
-                                "current_player": game.current_player
-                            }))
-                else:
-                    # Move to next player
-                    game.current_player = (game.current_player + 1) % 4
-                    for player_ws in game.players:
-                        await player_ws.send_text(json.dumps({
-                            "type": "next_player",
-                            "current_player": game.current_player
-                        }))
-            # await websocket.send_text(f"Message text was: {data}")
+                if actor is None or not actor.post(websocket, data):
+                    await websocket.send_text(json.dumps({"type": "error", "message": "Not in a game"}))
     finally:
+        batching_clients.discard(websocket)
+        rate_limiter.forget(websocket)
+        
+        # Cleanup when spectator disconnects
+        if websocket in spectator_to_game:
+            game_id = spectator_to_game.pop(websocket)
+            if game_id in games:
+                games[game_id].spectators.unsubscribe(websocket)
+        
         # Cleanup when player disconnects
-        if websocket in player_to_game:
-            game_id = player_to_game[websocket]
-            game = games[game_id]
-            
-            # Remove player from game
-            if websocket in game.players:
-                game.players.remove(websocket)
-            
-            # Remove player from positions
-            for direction in ["north", "south", "east", "west"]:
-                if getattr(game, direction) == websocket:
-                    setattr(game, direction, None)
-            
-            # Remove player from mapping
-            del player_to_game[websocket]
-            
-            # If game is empty, remove it
-            if len(game.players) == 0:
-                del games[game_id]
-            else:
-                # Notify remaining players
-                try:
-                    await broadcast_game_state(game, game_id)
-                except:
-                    pass
+        if actor is not None:
+            actor.post(websocket, "leave:")
@@ -0,0 +1,191 @@
+import time
+import json
+import asyncio
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from fastapi import WebSocket
+
+# Configuration
+SPECTATOR_MAX_PER_GAME = 10000  # Maximum number of spectators watching a single game
+SPECTATOR_FLUSH_INTERVAL = 0.0  # Seconds between flushes for a spectator keeping up (0 = immediately)
+SPECTATOR_SLOW_FLUSH_INTERVAL = 1.0  # Seconds between flushes once a spectator falls behind
+SPECTATOR_SLOW_SEND_THRESHOLD = 0.25  # A flush taking longer than this marks the spectator as slow
+SPECTATOR_MAX_PENDING = 256  # Pending events before the backlog is replaced by a fresh snapshot
+SPECTATOR_FAN_OUT_YIELD = 256  # Yield to the event loop after queueing for this many spectators
+SPECTATOR_CLOSE_TIMEOUT = 1.0  # Seconds the final message may take per spectator when a game is removed
+
+# Events where a lagging spectator only needs the most recent one
+COALESCED_EVENTS = {"next_player", "dummy_hand_updated", "game_state"}
+
+
+def batch_frames(frames: List[str]) -> str:
+    """Wrap already encoded events in a single batch envelope, keeping their order"""
+    return '{"type": "batch", "events": [' + ', '.join(frames) + ']}'
+
+
+class Spectator:
+    __slots__ = ("websocket", "batch", "greeting", "pending", "wakeup", "needs_snapshot", "min_sequence", "slow", "task")
+
+    def __init__(self, websocket: WebSocket, batch: bool = False, greeting: Optional[str] = None):
+        self.websocket = websocket
+        self.batch = batch  # Client accepts batch envelopes
+        self.greeting = greeting  # Encoded message sent once, ahead of the first snapshot
+        self.pending: List[Tuple[int, str, str]] = []  # (sequence, event type, encoded text)
+        self.wakeup = asyncio.Event()
+        self.needs_snapshot: bool = True  # Send a full snapshot before any events
+        self.min_sequence: int = 0  # Events at or below this are covered by the last snapshot
+        self.slow: bool = False
+        self.task: Optional[asyncio.Task] = None
+
+    def enqueue(self, sequence: int, event_type: str, text: str):
+        """Queue an encoded event, coalescing it with any pending event it supersedes"""
+        if sequence <= self.min_sequence or self.needs_snapshot:
+            return
+
+        if event_type in COALESCED_EVENTS:
+            self.pending = [p for p in self.pending if p[1] != event_type]
+        self.pending.append((sequence, event_type, text))
+
+        # Too far behind - drop the backlog and resync from a snapshot instead
+        if len(self.pending) > SPECTATOR_MAX_PENDING:
+            self.pending = []
+            self.needs_snapshot = True
+
+        self.wakeup.set()
+
+
+class SpectatorChannel:
+    """
+    Fan-out tier for the public event stream of a single game.
+    Players only pay for encoding each event once; per-spectator queueing
+    happens in the channel's own task, and each spectator drains its queue from
+    a separate sender task so slow watchers never hold up the table.
+    """
+
+    __slots__ = ("snapshot", "source", "spectators", "sequence", "inbox", "task")
+
+    def __init__(self, snapshot: Callable[[Any], Dict], source: Any):
+        self.snapshot = snapshot  # Builds the current public view of source (the game)
+        self.source = source
+        self.spectators: Dict[WebSocket, Spectator] = {}
+        self.sequence: int = 0  # Sequence number of the last published event
+        self.inbox: Optional[asyncio.Queue] = None
+        self.task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self.spectators)
+
+    def publish(self, message: Dict):
+        """Publish a public event to all spectators (never pass private data such as hands)"""
+        if not self.spectators:
+            self.sequence += 1
+            return
+        # Encode now so later mutations of the game state don't leak into the event
+        self.publish_frame(message["type"], json.dumps(message))
+
+    def publish_frame(self, event_type: str, text: str):
+        """publish() for an event that is already encoded"""
+        self.sequence += 1
+        if not self.spectators:
+            return
+        self.inbox.put_nowait((self.sequence, event_type, text))
+
+    def has_room(self, websocket: WebSocket) -> bool:
+        """Whether subscribe() would accept this connection"""
+        return websocket in self.spectators or len(self.spectators) < SPECTATOR_MAX_PER_GAME
+
+    def subscribe(self, websocket: WebSocket, batch: bool = False, greeting: Optional[Dict] = None) -> bool:
+        """Add a spectator, returns False if the game is at its spectator limit"""
+        if websocket in self.spectators:
+            return True
+        if not self.has_room(websocket):
+            return False
+
+        if self.task is None:
+            self.inbox = asyncio.Queue()
+            self.task = asyncio.create_task(self._fan_out())
+
+        spectator = Spectator(websocket, batch, json.dumps(greeting) if greeting is not None else None)
+        spectator.task = asyncio.create_task(self._send_loop(spectator))
+        spectator.wakeup.set()
+        self.spectators[websocket] = spectator
+        return True
+
+    def unsubscribe(self, websocket: WebSocket):
+        """Remove a spectator and stop its sender task"""
+        spectator = self.spectators.pop(websocket, None)
+        if spectator and spectator.task and spectator.task is not asyncio.current_task():
+            spectator.task.cancel()
+
+    async def close(self, message: Optional[Dict] = None) -> List[WebSocket]:
+        """Stop all tasks, optionally sending a final message; returns the removed spectators"""
+        websockets = list(self.spectators)
+        for websocket in websockets:
+            self.unsubscribe(websocket)
+
+        if self.task:
+            self.task.cancel()
+            self.task = None
+            self.inbox = None
+
+        # Sent to everyone at once, so a stalled socket can't hold up removing the game
+        if message is not None and websockets:
+            text = json.dumps(message)
+            await asyncio.gather(*(self._send_final(websocket, text) for websocket in websockets))
+        return websockets
+
+    @staticmethod
+    async def _send_final(websocket: WebSocket, text: str):
+        try:
+            await asyncio.wait_for(websocket.send_text(text), SPECTATOR_CLOSE_TIMEOUT)
+        except Exception:
+            pass  # Handle disconnected or stalled spectators
+
+    async def _fan_out(self):
+        """Queue each encoded event for every spectator"""
+        while True:
+            sequence, event_type, text = await self.inbox.get()
+
+            for i, spectator in enumerate(list(self.spectators.values())):
+                spectator.enqueue(sequence, event_type, text)
+                # Let player coroutines run while fanning out to large audiences
+                if (i + 1) % SPECTATOR_FAN_OUT_YIELD == 0:
+                    await asyncio.sleep(0)
+
+    async def _send_loop(self, spectator: Spectator):
+        """Drain a spectator's queue, throttling the update rate if it falls behind"""
+        websocket = spectator.websocket
+        while True:
+            await spectator.wakeup.wait()
+            spectator.wakeup.clear()
+
+            if spectator.needs_snapshot:
+                # Events up to the current sequence are already reflected in the snapshot
+                spectator.needs_snapshot = False
+                spectator.min_sequence = self.sequence
+                spectator.pending = []
+                frames = [json.dumps(self.snapshot(self.source))]
+                if spectator.greeting is not None:
+                    frames.insert(0, spectator.greeting)
+                    spectator.greeting = None
+            else:
+                frames = [text for _, _, text in spectator.pending]
+                spectator.pending = []
+                if spectator.batch and len(frames) > 1:
+                    frames = [batch_frames(frames)]
+
+            started = time.monotonic()
+            try:
+                for frame in frames:
+                    await websocket.send_text(frame)
+            except Exception:
+                self.unsubscribe(websocket)
+                return
+
+            spectator.slow = time.monotonic() - started > SPECTATOR_SLOW_SEND_THRESHOLD
+
+            # Give a lagging spectator's queue time to coalesce before the next flush
+            if spectator.slow:
+                await asyncio.sleep(SPECTATOR_SLOW_FLUSH_INTERVAL)
+            elif SPECTATOR_FLUSH_INTERVAL > 0:
+                await asyncio.sleep(SPECTATOR_FLUSH_INTERVAL)
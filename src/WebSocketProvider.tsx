@@ -15,6 +15,19 @@ let messageListeners: Array<(msg: string) => void> = [];
 let openListeners: Array<() => void> = [];
 let closeListeners: Array<() => void> = [];
 
+// Split a batch envelope back into the individual event messages it carries
+function unpackMessage(data: string): string[] {
+  try {
+    const parsed = JSON.parse(data);
+    if (parsed.type === 'batch' && Array.isArray(parsed.events)) {
+      return parsed.events.map((event: unknown) => JSON.stringify(event));
+    }
+  } catch {
+    // Not JSON, pass it through unchanged
+  }
+  return [data];
+}
+
 function getOrCreateWebSocket(): WebSocket {
   if (globalWs && (globalWs.readyState === WebSocket.OPEN || globalWs.readyState === WebSocket.CONNECTING)) {
     console.log('Reusing existing WebSocket connection');
@@ -39,12 +52,16 @@ function getOrCreateWebSocket(): WebSocket {
   globalWs.onopen = () => {
     console.log('WebSocket connection opened');
     isConnecting = false;
+    // Ask the server to send all events from one action in a single frame
+    globalWs?.send('caps:batch');
     openListeners.forEach(listener => listener());
   };
 
   globalWs.onmessage = (event) => {
     console.log('WebSocket message received:', event.data);
-    messageListeners.forEach(listener => listener(event.data));
+    unpackMessage(event.data).forEach(message => {
+      messageListeners.forEach(listener => listener(message));
+    });
   };
 
   globalWs.onclose = () => {